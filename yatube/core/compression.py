@@ -0,0 +1,150 @@
+import gzip
+import re
+
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+IDENTITY = 'identity'
+# Меньше этого сжатие не окупает заголовки и время.
+COMPRESS_MIN_LENGTH: int = 200
+GZIP_LEVEL: int = 6
+BROTLI_QUALITY: int = 5
+COMPRESSIBLE_TYPES = (
+    'text/', 'application/json', 'application/javascript', 'image/svg+xml',
+)
+
+# Внутри этих тегов пробелы значимы, их не трогаем.
+PRESERVED_RE = re.compile(
+    rb'(<(pre|textarea|script|style)\b.*?</\2\s*>)',
+    re.IGNORECASE | re.DOTALL)
+WHITESPACE_RE = re.compile(rb'\s{2,}|[\t\r\n]')
+
+
+def collapse(match):
+    return b'\n' if b'\n' in match.group() else b' '
+
+
+def minify_html(content):
+    """Схлопывает незначимые пробелы HTML.
+
+    Браузер всё равно показывает любую последовательность пробелов
+    как один, поэтому от отступов шаблонов остаётся один пробел или
+    перевод строки. pre, textarea, script и style не меняются.
+    """
+    parts = PRESERVED_RE.split(content)
+    # split отдаёт: текст, блок целиком, имя тега, текст, ...
+    for index in range(0, len(parts), 3):
+        parts[index] = WHITESPACE_RE.sub(collapse, parts[index])
+    return b''.join(
+        part for index, part in enumerate(parts) if index % 3 != 2)
+
+
+def available_encodings():
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def choose_encoding(accept_encoding):
+    """Лучшая кодировка из Accept-Encoding, которую мы умеем, или None."""
+    weights = {}
+    for item in accept_encoding.split(','):
+        name, _, params = item.strip().partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        weights[name.strip().lower()] = quality
+    best = None
+    for encoding in available_encodings():
+        quality = weights.get(encoding, weights.get('*', 0.0))
+        if quality > 0 and (best is None or quality > best[1]):
+            best = (encoding, quality)
+    return best and best[0]
+
+
+def compress(content, encoding):
+    if encoding == 'br':
+        return brotli.compress(content, quality=BROTLI_QUALITY)
+    return gzip.compress(content, GZIP_LEVEL, mtime=0)
+
+
+def cache_page(response, key, timeout):
+    """Кладёт страницу в кэш страниц.
+
+    В кэше лежит словарь вариантов тела: минифицированное и сжатые
+    кодировками, которые уже запрашивали клиенты. Сжатые варианты
+    дописывает CompressionMiddleware.
+    """
+    response.content = minify_html(response.content)
+    response.page_variants = {IDENTITY: response.content}
+    response.page_cache = (key, timeout)
+    cache.set(key, response.page_variants, timeout)
+    return response
+
+
+def cached_page(key, timeout):
+    """Ответ из кэша страниц или None."""
+    variants = cache.get(key)
+    if variants is None:
+        return None
+    response = HttpResponse(variants[IDENTITY])
+    response.page_variants = variants
+    response.page_cache = (key, timeout)
+    return response
+
+
+class CompressionMiddleware:
+    """Минифицирует HTML и сжимает ответ по Accept-Encoding.
+
+    Вариант страницы из кэша страниц сжимается один раз и
+    сохраняется там же, следующие попадания отдают готовые байты.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        content_type = response.get('Content-Type', '')
+        if (response.streaming or response.has_header('Content-Encoding')
+                or not content_type.startswith(COMPRESSIBLE_TYPES)):
+            return response
+        variants = getattr(response, 'page_variants', None)
+        if variants is None:
+            if content_type.startswith('text/html'):
+                response.content = minify_html(response.content)
+            variants = {IDENTITY: response.content}
+        response['Content-Length'] = str(len(response.content))
+        if len(response.content) < COMPRESS_MIN_LENGTH:
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = choose_encoding(
+            request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+        body = variants.get(encoding)
+        if body is None:
+            body = compress(variants[IDENTITY], encoding)
+            variants[encoding] = body
+            page_cache = getattr(response, 'page_cache', None)
+            if page_cache is not None:
+                key, timeout = page_cache
+                cache.set(key, variants, timeout)
+        if len(body) >= len(response.content):
+            return response
+        response.content = body
+        response['Content-Length'] = str(len(body))
+        response['Content-Encoding'] = encoding
+        # Сжатое тело уже не побайтово то же: ETag становится слабым.
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        return response
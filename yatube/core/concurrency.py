@@ -0,0 +1,47 @@
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection, connections
+
+executor = None
+executor_lock = threading.Lock()
+
+
+def get_executor():
+    global executor
+    with executor_lock:
+        if executor is None:
+            executor = ThreadPoolExecutor(
+                settings.READ_POOL_SIZE, thread_name_prefix='reads')
+        return executor
+
+
+def run_in_thread(call):
+    # У потока пула своё постоянное соединение; после ошибки БД
+    # проверяем, живо ли оно, как это делает Django между запросами.
+    if connection.errors_occurred:
+        connection.errors_occurred = False
+        if connection.connection is not None and not connection.is_usable():
+            connection.close()
+    return call()
+
+
+def gather(*calls):
+    """Выполняет независимые чтения из БД одновременно.
+
+    Первый вызов идёт в текущем потоке, остальные — в общем пуле
+    READ_POOL_SIZE потоков. Внутри транзакции всё выполняется по
+    очереди: другие соединения не видят её незакоммиченных записей.
+    """
+    if (settings.READ_POOL_SIZE < 1 or len(calls) < 2
+            or any(conn.in_atomic_block for conn in connections.all())):
+        return [call() for call in calls]
+    pool = get_executor()
+    # Контекст запроса (например, выбор реплики) переходит в потоки.
+    futures = [
+        pool.submit(contextvars.copy_context().run, run_in_thread, call)
+        for call in calls[1:]
+    ]
+    return [calls[0]()] + [future.result() for future in futures]
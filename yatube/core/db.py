@@ -0,0 +1,99 @@
+import random
+import time
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+PRIMARY_COOKIE = 'primary_until'
+# Сессии читаются только с основной БД: после входа копия может отстать.
+PRIMARY_ONLY_APPS = {'sessions'}
+# По отметкам изменения страниц решается, читать ли дальше с реплики:
+# отставшая отметка не дала бы прочитать свою запись.
+PRIMARY_ONLY_MODELS = {'posts.pagechange'}
+
+
+class RoutingState:
+    """Куда можно читать в рамках текущего запроса."""
+
+    def __init__(self, pinned=False):
+        self.replica = False
+        self.pinned = pinned
+        self.wrote = False
+
+
+routing = ContextVar('db_routing', default=None)
+
+
+def pin_to_primary():
+    """До конца запроса все чтения идут в основную БД."""
+    state = routing.get()
+    if state is not None:
+        state.pinned = True
+
+
+def replica_reads(view):
+    """Разрешает view читать с реплик из DATABASE_REPLICAS."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        state = routing.get()
+        if state is None:
+            return view(request, *args, **kwargs)
+        previous, state.replica = state.replica, True
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            state.replica = previous
+    return wrapper
+
+
+class ReplicaRouter:
+    """Чтения помеченных view — на реплики, всё остальное — в default."""
+
+    def db_for_read(self, model, **hints):
+        state = routing.get()
+        replicas = settings.DATABASE_REPLICAS
+        if (state is None or not replicas or not state.replica
+                or state.pinned or state.wrote
+                or model._meta.app_label in PRIMARY_ONLY_APPS
+                or model._meta.label_lower in PRIMARY_ONLY_MODELS):
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        state = routing.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики содержат те же данные, что и основная БД.
+        return True
+
+
+class ReplicaMiddleware:
+    """Чтение своих записей: после записи клиент какое-то время
+    читает только из основной БД, пока реплики не догонят её.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            until = float(request.COOKIES.get(PRIMARY_COOKIE, 0))
+        except ValueError:
+            until = 0
+        state = RoutingState(pinned=until > time.time())
+        token = routing.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            routing.reset(token)
+        if state.wrote:
+            window = settings.READ_YOUR_WRITES_SECONDS
+            response.set_cookie(
+                PRIMARY_COOKIE, str(time.time() + window), max_age=window,
+                httponly=True, samesite='Lax')
+        return response
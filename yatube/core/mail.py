@@ -0,0 +1,149 @@
+import base64
+import json
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Job, OutboxEmail
+from .tasks import task
+
+MAX_ATTEMPTS: int = 5
+
+
+class OutboxDeliveryError(Exception):
+    """Часть писем не ушла и ждёт повтора задачи."""
+
+
+def dump_message(message):
+    attachments = []
+    for attachment in message.attachments:
+        if isinstance(attachment, tuple):
+            filename, content, mimetype = attachment
+            if isinstance(content, str):
+                content = content.encode()
+            attachments.append(
+                [filename, base64.b64encode(content).decode(), mimetype])
+    return json.dumps({
+        'subject': message.subject,
+        'body': message.body,
+        'from_email': message.from_email,
+        'to': message.to,
+        'cc': message.cc,
+        'bcc': message.bcc,
+        'reply_to': message.reply_to,
+        'headers': message.extra_headers,
+        'alternatives': getattr(message, 'alternatives', []),
+        'attachments': attachments,
+    })
+
+
+def load_message(data, connection=None):
+    data = json.loads(data)
+    attachments = [
+        (filename, base64.b64decode(content), mimetype)
+        for filename, content, mimetype in data.pop('attachments')
+    ]
+    alternatives = [tuple(alt) for alt in data.pop('alternatives')]
+    return EmailMultiAlternatives(
+        alternatives=alternatives, attachments=attachments,
+        connection=connection, **data)
+
+
+class OutboxBackend(BaseEmailBackend):
+    """Кладёт письма в таблицу исходящих вместо отправки в запросе."""
+
+    def send_messages(self, email_messages):
+        OutboxEmail.objects.bulk_create(
+            OutboxEmail(message=dump_message(message))
+            for message in email_messages
+        )
+        # Выполняющаяся задача могла уже закончить разбор очереди, а
+        # отложенная после сбоя — ждать долго: новым письмам нужна своя.
+        already_queued = Job.objects.filter(
+            name=deliver_outbox.name, status=Job.QUEUED,
+            run_at__lte=timezone.now()).exists()
+        # Отправка — всегда дело воркера, даже при TASKS_SYNC: запрос
+        # не ждёт SMTP и не падает, если письмо не ушло.
+        if email_messages and not already_queued:
+            deliver_outbox.enqueue()
+        return len(email_messages)
+
+
+def claim_batch(batch_size, skip=()):
+    """Забирает пачку писем в отправку.
+
+    Письма, взятые упавшим воркером, возвращаются в работу после
+    OUTBOX_CLAIM_TIMEOUT секунд. skip — письма, уже не ушедшие
+    в этом прогоне.
+    """
+    token = uuid.uuid4().hex
+    now = timezone.now()
+    stale = now - timedelta(
+        seconds=getattr(settings, 'OUTBOX_CLAIM_TIMEOUT', 600))
+    claimable = (Q(status=OutboxEmail.QUEUED)
+                 | Q(status=OutboxEmail.SENDING, claimed_at__lt=stale))
+    ids = list(
+        OutboxEmail.objects.filter(claimable).exclude(pk__in=skip)
+        .values_list('pk', flat=True)[:batch_size]
+    )
+    OutboxEmail.objects.filter(claimable, pk__in=ids).update(
+        status=OutboxEmail.SENDING, claim=token, claimed_at=now)
+    return list(OutboxEmail.objects.filter(claim=token))
+
+
+def send_email(connection, email):
+    """Отправляет одно письмо и записывает результат в очередь."""
+    email.attempts += 1
+    try:
+        connection.send_messages([load_message(email.message, connection)])
+    except Exception as error:
+        email.last_error = repr(error)
+        email.status = (
+            OutboxEmail.FAILED if email.attempts >= MAX_ATTEMPTS
+            else OutboxEmail.QUEUED)
+    else:
+        email.status = OutboxEmail.SENT
+        email.sent_at = timezone.now()
+    email.claim = ''
+    email.save(update_fields=[
+        'attempts', 'last_error', 'status', 'sent_at', 'claim'])
+    return email.status
+
+
+@task
+def deliver_outbox(batch_size=None):
+    """Отправляет очередь пачками через одно SMTP-соединение.
+
+    Если какие-то письма не ушли и ещё не исчерпали попыток, задача
+    падает с OutboxDeliveryError: очередь задач повторит её с паузой.
+    """
+    batch_size = batch_size or getattr(settings, 'OUTBOX_BATCH_SIZE', 100)
+    connection = get_connection(getattr(
+        settings, 'OUTBOX_EMAIL_BACKEND',
+        'django.core.mail.backends.smtp.EmailBackend'))
+    sent = 0
+    retry = []
+    connection.open()
+    try:
+        while True:
+            # Не крутимся на одном и том же письме в одном прогоне.
+            batch = claim_batch(batch_size, skip=retry)
+            if not batch:
+                break
+            for email in batch:
+                status = send_email(connection, email)
+                if status == OutboxEmail.SENT:
+                    sent += 1
+                elif status == OutboxEmail.QUEUED:
+                    retry.append(email.pk)
+    finally:
+        connection.close()
+    if retry:
+        raise OutboxDeliveryError(
+            f'Отправлено {sent}, ждут повтора: {len(retry)}')
+    return sent
@@ -0,0 +1,42 @@
+import glob
+import json
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.perf import PERCENTILES, load_snapshots, summarize
+
+
+class Command(BaseCommand):
+    help = 'Показывает перцентили времени ответа по view'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--json', action='store_true',
+                            help='Вывести сводку в JSON')
+        parser.add_argument('--reset', action='store_true',
+                            help='Удалить сохранённые снимки')
+
+    def handle(self, *args, **options):
+        if options['reset']:
+            pattern = os.path.join(settings.PERFSTATS_DIR, 'perfstats-*')
+            for path in glob.glob(pattern):
+                os.remove(path)
+            return
+        summary = summarize(load_snapshots())
+        if options['json']:
+            self.stdout.write(json.dumps(summary, indent=2))
+            return
+        columns = [
+            f'{metric} p{percent}'
+            for metric in ('wall_ms', 'queries', 'db_ms', 'template_ms')
+            for percent in PERCENTILES
+        ]
+        self.stdout.write('\t'.join(['view', 'count'] + columns))
+        for view, stats in summary.items():
+            row = [view, str(stats['count'])] + [
+                str(stats[metric][f'p{percent}'])
+                for metric in ('wall_ms', 'queries', 'db_ms', 'template_ms')
+                for percent in PERCENTILES
+            ]
+            self.stdout.write('\t'.join(row))
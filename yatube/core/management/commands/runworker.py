@@ -0,0 +1,54 @@
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core.tasks import claim_jobs, run_job
+
+
+class Command(BaseCommand):
+    help = 'Выполняет отложенные задачи из очереди'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=4,
+            help='Размер пула, 1 — выполнять в текущем потоке')
+        parser.add_argument(
+            '--pool', choices=('thread', 'process'), default='thread',
+            help='Пул потоков или процессов')
+        parser.add_argument(
+            '--poll', type=float, default=1.0,
+            help='Пауза между опросами пустой очереди, секунд')
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выйти, когда очередь опустеет')
+
+    def handle(self, *args, **options):
+        workers = options['workers']
+        pool = None
+        if workers > 1:
+            if options['pool'] == 'process':
+                # Дочерние процессы не должны делить соединение с родителем.
+                connections.close_all()
+                pool = ProcessPoolExecutor(
+                    max_workers=workers, initializer=connections.close_all)
+            else:
+                pool = ThreadPoolExecutor(max_workers=workers)
+        run = pool.map if pool else map
+        done = 0
+        try:
+            while True:
+                jobs = claim_jobs(limit=workers)
+                if not jobs:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll'])
+                    continue
+                done += len(list(run(run_job, jobs)))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if pool:
+                pool.shutdown()
+        self.stdout.write(self.style.SUCCESS(f'Обработано задач: {done}'))
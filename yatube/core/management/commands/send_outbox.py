@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.mail import OutboxDeliveryError, deliver_outbox
+
+
+class Command(BaseCommand):
+    help = 'Отправляет накопленные письма из очереди исходящих'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=None,
+            help='Писем в одной пачке')
+
+    def handle(self, *args, **options):
+        try:
+            sent = deliver_outbox(options['batch_size'])
+        except OutboxDeliveryError as error:
+            raise CommandError(error)
+        self.stdout.write(self.style.SUCCESS(f'Отправлено писем: {sent}'))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.templates import warm_templates
+
+
+class Command(BaseCommand):
+    help = 'Компилирует все шаблоны и сообщает об ошибках в них'
+
+    def handle(self, *args, **options):
+        count, errors = warm_templates()
+        for name, error in errors:
+            self.stderr.write(f'{name}: {error}')
+        if errors:
+            raise CommandError(f'Шаблонов с ошибками: {len(errors)}')
+        self.stdout.write(self.style.SUCCESS(f'Шаблонов: {count}'))
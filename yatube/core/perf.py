@@ -0,0 +1,293 @@
+import glob
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates
+from django.template.backends.django import Template as DjangoTemplate
+from django.template.backends.django import reraise
+
+# Границы корзин: время в мс растёт в 1.25 раза от 0.1 мс до ~2 минут,
+# число запросов — поштучно до 100, дальше крупнее.
+TIME_BOUNDS = [0.1 * 1.25 ** i for i in range(64)]
+COUNT_BOUNDS = list(range(101)) + [150, 200, 500, 1000, 10 ** 6]
+PERCENTILES = (50, 95, 99)
+# Снимок, не обновлявшийся столько интервалов сохранения, оставил
+# завершившийся процесс: его в сводку не берём и удаляем.
+STALE_FLUSHES: int = 6
+METRICS = {
+    'wall_ms': TIME_BOUNDS,
+    'db_ms': TIME_BOUNDS,
+    'queries': COUNT_BOUNDS,
+    'template_ms': TIME_BOUNDS,
+}
+
+current = ContextVar('perf_request', default=None)
+
+logger = logging.getLogger(__name__)
+
+
+class Histogram:
+    """Гистограмма с фиксированными корзинами: сливается сложением."""
+
+    __slots__ = ('bounds', 'counts', 'total')
+
+    def __init__(self, bounds, counts=None):
+        self.bounds = bounds
+        self.counts = counts or [0] * len(bounds)
+        self.total = sum(self.counts)
+
+    def add(self, value):
+        index = min(bisect_left(self.bounds, value), len(self.bounds) - 1)
+        self.counts[index] += 1
+        self.total += 1
+
+    def merge(self, other):
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.total += other.total
+
+    def percentile(self, percent):
+        """Верхняя граница корзины, в которую попадает перцентиль."""
+        if not self.total:
+            return 0
+        rank = self.total * percent / 100
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= rank:
+                return round(bound, 2)
+        return round(self.bounds[-1], 2)
+
+
+class ViewStats:
+    def __init__(self, counts=None):
+        counts = counts or {}
+        self.histograms = {
+            metric: Histogram(bounds, counts.get(metric))
+            for metric, bounds in METRICS.items()
+        }
+
+    @property
+    def count(self):
+        return self.histograms['wall_ms'].total
+
+    def add(self, values):
+        for metric, value in values.items():
+            self.histograms[metric].add(value)
+
+    def merge(self, other):
+        for metric, histogram in self.histograms.items():
+            histogram.merge(other.histograms[metric])
+
+    def dump(self):
+        return {metric: h.counts for metric, h in self.histograms.items()}
+
+    def summary(self):
+        result = {'count': self.count}
+        for metric, histogram in self.histograms.items():
+            result[metric] = {
+                f'p{percent}': histogram.percentile(percent)
+                for percent in PERCENTILES
+            }
+        return result
+
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.views = {}
+        self.flushed_at = time.monotonic()
+        self.owner = None
+        self.token = None
+
+    def record(self, view, values):
+        with self.lock:
+            stats = self.views.get(view)
+            if stats is None:
+                stats = self.views[view] = ViewStats()
+            stats.add(values)
+
+    def snapshot(self):
+        with self.lock:
+            return {view: stats.dump() for view, stats in self.views.items()}
+
+    def reset(self):
+        with self.lock:
+            self.views.clear()
+
+    def maybe_flush(self):
+        interval = getattr(settings, 'PERFSTATS_FLUSH_INTERVAL', 10)
+        if time.monotonic() - self.flushed_at < interval:
+            return
+        # Снимок сохраняет один поток, остальные запросы его не ждут.
+        if self.flush_lock.acquire(blocking=False):
+            try:
+                self._write()
+            finally:
+                self.flush_lock.release()
+
+    def flush(self):
+        """Сохраняет снимок процесса для manage.py perfstats."""
+        with self.flush_lock:
+            self._write()
+
+    def _write(self):
+        self.flushed_at = time.monotonic()
+        directory = settings.PERFSTATS_DIR
+        os.makedirs(directory, exist_ok=True)
+        path = self.snapshot_path(directory)
+        # Своё имя временного файла: снимок не перепишет чужой
+        # недописанный, а load_snapshots его не подхватит.
+        descriptor, temp_path = tempfile.mkstemp(
+            dir=directory, prefix=f'perfstats-{os.getpid()}-',
+            suffix='.tmp')
+        try:
+            with os.fdopen(descriptor, 'w') as file:
+                json.dump(self.snapshot(), file)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    def snapshot_path(self, directory):
+        """Файл снимка процесса.
+
+        В имени кроме pid случайная метка: процесс, получивший pid
+        завершившегося, не перепишет чужой снимок. Метка новая и
+        после fork.
+        """
+        pid = os.getpid()
+        if self.owner != pid:
+            self.owner, self.token = pid, uuid.uuid4().hex[:8]
+        return os.path.join(directory, f'perfstats-{pid}-{self.token}.json')
+
+
+registry = Registry()
+
+
+def summarize(snapshots):
+    """Сводка по снимкам нескольких процессов."""
+    merged = {}
+    for snapshot in snapshots:
+        for view, counts in snapshot.items():
+            stats = ViewStats(counts)
+            if view in merged:
+                merged[view].merge(stats)
+            else:
+                merged[view] = stats
+    return {view: merged[view].summary() for view in sorted(merged)}
+
+
+def load_snapshots():
+    """Снимки живых процессов; устаревшие снимки удаляются."""
+    interval = getattr(settings, 'PERFSTATS_FLUSH_INTERVAL', 10)
+    stale_before = time.time() - interval * STALE_FLUSHES
+    snapshots = []
+    pattern = os.path.join(settings.PERFSTATS_DIR, 'perfstats-*.json')
+    for path in glob.glob(pattern):
+        try:
+            if os.path.getmtime(path) < stale_before:
+                os.remove(path)
+                continue
+            with open(path) as file:
+                snapshots.append(json.load(file))
+        except FileNotFoundError:
+            # Снимок удалил другой отчёт или --reset.
+            continue
+    return snapshots
+
+
+class RequestTimer:
+    __slots__ = ('queries', 'db', 'template', 'rendering')
+
+    def __init__(self):
+        self.queries = 0
+        self.db = 0.0
+        self.template = 0.0
+        # Идёт отрисовка шаблона: вложенные время уже не считают.
+        self.rendering = False
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db += time.perf_counter() - start
+            self.queries += 1
+
+
+class PerfStatsMiddleware:
+    """Время запроса, запросы к БД и отрисовка шаблонов по каждой view."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timer = RequestTimer()
+        token = current.set(timer)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(timer))
+                response = self.get_response(request)
+        finally:
+            current.reset(token)
+        match = request.resolver_match
+        try:
+            registry.record(match.view_name if match else 'unresolved', {
+                'wall_ms': (time.perf_counter() - start) * 1000,
+                'db_ms': timer.db * 1000,
+                'queries': timer.queries,
+                'template_ms': timer.template * 1000,
+            })
+            registry.maybe_flush()
+        except Exception:
+            # Метрики не должны ронять запрос, который уже обработан.
+            logger.exception('Не удалось сохранить метрики запроса')
+        return response
+
+
+class TimedTemplate(DjangoTemplate):
+    """Шаблон, чья отрисовка входит в template_ms запроса.
+
+    Шаблон, отрисованный внутри другого (например, карточки в ленте),
+    уже входит во время внешнего и второй раз не считается.
+    """
+
+    def render(self, context=None, request=None):
+        timer = current.get()
+        if timer is None or timer.rendering:
+            return super().render(context, request)
+        timer.rendering = True
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            timer.rendering = False
+            timer.template += time.perf_counter() - start
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """Шаблонный бэкенд, который сообщает время отрисовки в PerfStats."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return TimedTemplate(
+                self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
@@ -0,0 +1,119 @@
+import functools
+import json
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+MAX_RETRY_DELAY: int = 60 * 60
+
+
+class Task:
+    """Функция, которую можно отложить в очередь через .delay()."""
+
+    def __init__(self, func, max_attempts):
+        functools.update_wrapper(self, func)
+        self.func = func
+        self.name = f'{func.__module__}.{func.__qualname__}'
+        self.max_attempts = max_attempts
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def delay(self, *args, **kwargs):
+        if getattr(settings, 'TASKS_SYNC', False):
+            self.func(*args, **kwargs)
+            return None
+        return self.enqueue(*args, **kwargs)
+
+    def delay_once(self, *args, **kwargs):
+        """Как delay, но не дублирует такую же ждущую или идущую задачу."""
+        if getattr(settings, 'TASKS_SYNC', False):
+            return self.delay(*args, **kwargs)
+        pending = Job.objects.filter(
+            name=self.name, payload=self.payload(args, kwargs),
+            status__in=(Job.QUEUED, Job.RUNNING),
+        ).first()
+        return pending or self.enqueue(*args, **kwargs)
+
+    def enqueue(self, *args, **kwargs):
+        """Ставит задачу в очередь и в синхронном режиме."""
+        return Job.objects.create(
+            name=self.name,
+            payload=self.payload(args, kwargs),
+            max_attempts=self.max_attempts,
+        )
+
+    def payload(self, args, kwargs):
+        return json.dumps({'args': list(args), 'kwargs': kwargs})
+
+
+def task(func=None, *, max_attempts=5):
+    if func is None:
+        return functools.partial(task, max_attempts=max_attempts)
+    return Task(func, max_attempts)
+
+
+def retry_delay(attempts):
+    base = getattr(settings, 'TASKS_RETRY_DELAY', 10)
+    return timedelta(seconds=min(base * 2 ** (attempts - 1), MAX_RETRY_DELAY))
+
+
+def claim_jobs(limit):
+    """Забирает готовые задачи; зависшие дольше таймаута берутся заново."""
+    now = timezone.now()
+    stale = now - timedelta(seconds=getattr(settings, 'TASKS_LOCK_TIMEOUT',
+                                            600))
+    candidates = Job.objects.filter(
+        Q(status=Job.QUEUED, run_at__lte=now)
+        | Q(status=Job.RUNNING, locked_at__lt=stale)
+    ).values_list('pk', 'status', 'locked_at')[:limit]
+    claimed = []
+    for pk, status, locked_at in candidates:
+        # Условный UPDATE: из двух воркеров задачу получит только один.
+        if Job.objects.filter(
+                pk=pk, status=status, locked_at=locked_at).update(
+                    status=Job.RUNNING, locked_at=now):
+            claimed.append(pk)
+    return claimed
+
+
+def run_job(pk):
+    job = Job.objects.get(pk=pk)
+    try:
+        payload = json.loads(job.payload)
+        import_string(job.name).func(*payload['args'], **payload['kwargs'])
+    except Exception:
+        job.attempts += 1
+        job.last_error = traceback.format_exc()
+        if job.attempts < job.max_attempts:
+            job.status = Job.QUEUED
+            job.run_at = timezone.now() + retry_delay(job.attempts)
+        else:
+            job.status = Job.FAILED
+            logger.exception('Задача %s #%s не выполнена', job.name, pk)
+    else:
+        job.attempts += 1
+        job.status = Job.DONE
+    job.locked_at = None
+    job.save(update_fields=['attempts', 'last_error', 'status', 'run_at',
+                            'locked_at'])
+    if not connection.in_atomic_block:
+        connection.close()
+    return job.status
+
+
+def clear_done(older_than):
+    with transaction.atomic():
+        return Job.objects.filter(
+            status=Job.DONE, created__lt=timezone.now() - older_than
+        ).delete()[0]
@@ -0,0 +1,95 @@
+import os
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.template import TemplateSyntaxError, engines
+from django.template.backends.django import DjangoTemplates
+from django.template.base import Template
+from django.template.loaders.base import Loader
+
+# Скрытые файлы и резервные копии редакторов — не шаблоны.
+SKIPPED_PREFIXES = ('.', '#')
+
+
+def loader_dirs(loaders):
+    """Каталоги, в которых ищут шаблоны загрузчики, включая вложенные
+    в cached.Loader."""
+    for loader in loaders:
+        if hasattr(loader, 'get_dirs'):
+            yield from loader.get_dirs()
+        else:
+            yield from loader_dirs(getattr(loader, 'loaders', ()))
+
+
+def template_names(engine):
+    """Имена всех шаблонов движка, в порядке поиска каталогов."""
+    names = {}
+    for directory in loader_dirs(engine.template_loaders):
+        for root, _, files in os.walk(directory):
+            for file in files:
+                if file.startswith(SKIPPED_PREFIXES):
+                    continue
+                path = os.path.join(root, file)
+                name = os.path.relpath(path, directory).replace(os.sep, '/')
+                names.setdefault(name, path)
+    return list(names)
+
+
+def warm_templates():
+    """Компилирует все шаблоны Django-движков заранее.
+
+    С cached.Loader первый запрос после деплоя получает уже
+    разобранные шаблоны. Возвращает число шаблонов и ошибки
+    компиляции вида (имя, исключение).
+    """
+    count = 0
+    errors = []
+    for backend in engines.all():
+        if not isinstance(backend, DjangoTemplates):
+            continue
+        for name in template_names(backend.engine):
+            try:
+                backend.engine.get_template(name)
+            except (TemplateSyntaxError, UnicodeDecodeError) as error:
+                errors.append((name, error))
+            else:
+                count += 1
+    return count, errors
+
+
+@contextmanager
+def template_timings():
+    """Собирает по имени шаблона число отрисовок, их время и число
+    компиляций.
+
+    Время отрисовки включающее: в него входят подключённые шаблоны
+    и родитель из extends, а у шаблонов без cached.Loader — ещё и их
+    компиляция.
+    """
+    stats = defaultdict(lambda: {'renders': 0, 'render_ms': 0.0,
+                                 'compiles': 0})
+    render = Template._render
+    load = Loader.get_template
+
+    def timed_render(self, context):
+        start = time.perf_counter()
+        try:
+            return render(self, context)
+        finally:
+            entry = stats[self.origin.template_name or self.origin.name]
+            entry['renders'] += 1
+            entry['render_ms'] += (time.perf_counter() - start) * 1000
+
+    def counted_load(self, template_name, skip=None):
+        template = load(self, template_name, skip)
+        stats[template_name]['compiles'] += 1
+        return template
+
+    Template._render = timed_render
+    Loader.get_template = counted_load
+    try:
+        yield stats
+    finally:
+        Template._render = render
+        Loader.get_template = load
@@ -0,0 +1,18 @@
+from django.test import override_settings
+from django.test.runner import DiscoverRunner
+
+
+class TestRunner(DiscoverRunner):
+    """Тесты идут с TASKS_SYNC: .delay() выполняет задачу сразу.
+
+    Тесты очереди выключают режим через override_settings.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.sync_tasks = override_settings(TASKS_SYNC=True)
+        self.sync_tasks.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.sync_tasks.disable()
+        super().teardown_test_environment(**kwargs)
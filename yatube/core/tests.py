@@ -1,4 +1,54 @@
-from django.test import TestCase
+import gzip
+import json
+import os
+import socketserver
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import CommandError, call_command
+from django.db import OperationalError, transaction
+from django.db.utils import ConnectionHandler
+from django.template import engines
+from django.test import (
+    SimpleTestCase, TestCase, TransactionTestCase, override_settings,
+)
+from django.urls import reverse
+from django.utils import timezone
+
+from yatube import settings as base_settings
+from yatube.settings_production import DATABASES as PRODUCTION_DATABASES
+from yatube.settings_production import TEMPLATES as PRODUCTION_TEMPLATES
+
+from .compression import choose_encoding, minify_html
+from .concurrency import gather
+from .mail import deliver_outbox
+from .models import Job, OutboxEmail
+from .perf import (TIME_BOUNDS, Histogram, RequestTimer, current,
+                   load_snapshots, registry)
+from .tasks import run_job, task
+from .templates import template_names, warm_templates
+
+User = get_user_model()
+
+calls = []
+
+
+@task
+def remember(value):
+    calls.append(value)
+
+
+@task(max_attempts=2)
+def explode():
+    raise RuntimeError('boom')
 
 
 class ViewTestClass(TestCase):
@@ -6,3 +56,424 @@ class ViewTestClass(TestCase):
         response = self.client.get('/nonexist-page/')
         self.assertTemplateUsed(response, 'core/404.html')
         self.assertEqual(response.status_code, 404)
+
+
+@override_settings(TASKS_SYNC=False)
+class TaskQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def run_worker(self):
+        call_command('runworker', workers=1, once=True, stdout=StringIO())
+
+    def test_delay_queues_and_worker_runs(self):
+        """Отложенная задача ждёт воркера и выполняется им."""
+        remember.delay('value')
+        self.assertEqual(calls, [])
+        self.assertEqual(Job.objects.get().status, Job.QUEUED)
+        self.run_worker()
+        self.assertEqual(calls, ['value'])
+        self.assertEqual(Job.objects.get().status, Job.DONE)
+
+    def test_tasks_queued_outside_tests(self):
+        """Вне тестов задачи по умолчанию уходят в очередь."""
+        self.assertFalse(base_settings.TASKS_SYNC)
+
+    @override_settings(TASKS_SYNC=True)
+    def test_sync_mode_runs_inline(self):
+        """В синхронном режиме задача выполняется сразу."""
+        remember.delay('value')
+        self.assertEqual(calls, ['value'])
+        self.assertFalse(Job.objects.exists())
+
+    def test_failed_job_retried_with_backoff(self):
+        """Упавшая задача откладывается, а после лимита попыток помечается."""
+        job = explode.delay()
+        self.run_worker()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.QUEUED)
+        self.assertEqual(job.attempts, 1)
+        self.assertGreater(job.run_at, timezone.now())
+        self.assertIn('boom', job.last_error)
+        Job.objects.update(run_at=timezone.now())
+        self.run_worker()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(job.attempts, 2)
+
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(f'{line}\r\n'.encode())
+
+    def handle(self):
+        self.server.connections += 1
+        self.reply('220 localhost')
+        for line in self.rfile:
+            command = line.decode().strip().upper()
+            if command.startswith(('EHLO', 'HELO')):
+                self.reply('250 localhost')
+            elif command == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                body = []
+                for data in self.rfile:
+                    if data == b'.\r\n':
+                        break
+                    body.append(data)
+                self.server.messages.append(b''.join(body))
+                self.reply('250 OK')
+            elif command == 'QUIT':
+                self.reply('221 Bye')
+                break
+            else:
+                self.reply('250 OK')
+
+
+class BouncingBackend(EmailBackend):
+    """Не принимает письма на адреса из домена bounce.ru."""
+
+    def send_messages(self, messages):
+        for message in messages:
+            if any(to.endswith('@bounce.ru') for to in message.to):
+                raise ConnectionError('Сервер отклонил письмо')
+        return super().send_messages(messages)
+
+
+class LocalSMTPServer(socketserver.ThreadingTCPServer):
+    """SMTP-заглушка: принимает письма и считает соединения."""
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), SMTPHandler)
+        self.connections = 0
+        self.messages = []
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
+        self.server_close()
+
+
+@override_settings(EMAIL_BACKEND='core.mail.OutboxBackend', TASKS_SYNC=False)
+class OutboxTests(TestCase):
+    def queue_emails(self, count):
+        for i in range(count):
+            mail.send_mail(f'subject-{i}', 'body', 'from@yatube.ru',
+                           [f'user{i}@yatube.ru'])
+
+    def test_password_reset_queues_email(self):
+        """Сброс пароля только ставит письмо в очередь."""
+        User.objects.create_user(
+            username='NoName', email='no@yatube.ru', password='pass')
+        response = self.client.post('/auth/password_reset/',
+                                    {'email': 'no@yatube.ru'})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(OutboxEmail.objects.count(), 1)
+        self.assertEqual(Job.objects.get().name, deliver_outbox.name)
+        self.assertEqual(mail.outbox, [])
+
+    @override_settings(TASKS_SYNC=True,
+                       OUTBOX_EMAIL_BACKEND='core.tests.BouncingBackend')
+    def test_sync_mode_does_not_send_in_request(self):
+        """Письмо не уходит в запросе и в синхронном режиме задач."""
+        User.objects.create_user(
+            username='NoName', email='no@bounce.ru', password='pass')
+        response = self.client.post('/auth/password_reset/',
+                                    {'email': 'no@bounce.ru'})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(
+            OutboxEmail.objects.get().status, OutboxEmail.QUEUED)
+        self.assertEqual(Job.objects.get().status, Job.QUEUED)
+
+    def test_outbox_sent_over_one_connection(self):
+        """Очередь уходит пачками через одно SMTP-соединение."""
+        self.queue_emails(5)
+        self.assertEqual(Job.objects.count(), 1)
+        with LocalSMTPServer() as server:
+            with override_settings(
+                    OUTBOX_EMAIL_BACKEND=(
+                        'django.core.mail.backends.smtp.EmailBackend'),
+                    EMAIL_HOST='127.0.0.1',
+                    EMAIL_PORT=server.server_address[1]):
+                sent = deliver_outbox(batch_size=2)
+        self.assertEqual(sent, 5)
+        self.assertEqual(server.connections, 1)
+        self.assertEqual(len(server.messages), 5)
+        self.assertIn(b'subject-4', server.messages[-1])
+        self.assertEqual(
+            OutboxEmail.objects.filter(status=OutboxEmail.SENT).count(), 5)
+
+    @override_settings(OUTBOX_EMAIL_BACKEND='core.tests.BouncingBackend')
+    def test_failed_email_retried_by_queue(self):
+        """Неотправленное письмо возвращает задачу в очередь с паузой."""
+        mail.send_mail('s', 'body', 'from@yatube.ru', ['user@bounce.ru'])
+        mail.send_mail('s', 'body', 'from@yatube.ru', ['user@yatube.ru'])
+        job = Job.objects.get()
+        self.assertEqual(run_job(job.pk), Job.QUEUED)
+        job.refresh_from_db()
+        self.assertGreater(job.run_at, timezone.now())
+        self.assertIn('OutboxDeliveryError', job.last_error)
+        self.assertEqual(len(mail.outbox), 1)
+        bounced = OutboxEmail.objects.get(status=OutboxEmail.QUEUED)
+        self.assertEqual(bounced.attempts, 1)
+
+    @override_settings(
+        OUTBOX_EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+    def test_stale_claim_reclaimed(self):
+        """Письма упавшего воркера снова уходят после таймаута."""
+        self.queue_emails(2)
+        OutboxEmail.objects.update(
+            status=OutboxEmail.SENDING, claim='dead',
+            claimed_at=timezone.now() - timedelta(hours=1))
+        OutboxEmail.objects.filter(pk=OutboxEmail.objects.last().pk).update(
+            claimed_at=timezone.now())
+        self.assertEqual(deliver_outbox(), 1)
+        self.assertEqual(
+            OutboxEmail.objects.filter(status=OutboxEmail.SENDING).count(), 1)
+
+    def test_mail_during_running_job_queues_new_job(self):
+        """Письмо, пришедшее во время отправки, получает свою задачу."""
+        self.queue_emails(1)
+        Job.objects.update(status=Job.RUNNING)
+        self.queue_emails(1)
+        self.assertEqual(Job.objects.filter(status=Job.QUEUED).count(), 1)
+
+    @override_settings(OUTBOX_EMAIL_BACKEND='core.tests.BouncingBackend')
+    def test_command_reports_undelivered(self):
+        """Команда отправки сообщает о неотправленных письмах."""
+        mail.send_mail('s', 'body', 'from@yatube.ru', ['user@bounce.ru'])
+        with self.assertRaises(CommandError):
+            call_command('send_outbox', stdout=StringIO())
+
+
+class PerfStatsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        registry.reset()
+
+    def test_histogram_percentiles(self):
+        """Перцентили берутся по верхней границе корзины."""
+        histogram = Histogram(TIME_BOUNDS)
+        for value in [1] * 90 + [100] * 10:
+            histogram.add(value)
+        self.assertLess(histogram.percentile(50), 1.25)
+        self.assertGreaterEqual(histogram.percentile(99), 100)
+
+    def test_request_is_recorded_by_view_name(self):
+        """Middleware пишет время, запросы к БД и отрисовку по view."""
+        self.client.get('/')
+        stats = registry.snapshot()['posts:index']
+        self.assertEqual(sum(stats['wall_ms']), 1)
+        self.assertEqual(stats['queries'][0], 0)
+        self.assertEqual(stats['template_ms'][0], 0)
+
+    def test_nested_render_counted_once(self):
+        """Шаблон внутри другого не добавляет своё время второй раз."""
+        [backend] = engines.all()
+        clock = [0.0]
+
+        def slow_card():
+            clock[0] += 5
+            return 'карточка'
+
+        inner = backend.from_string('{{ card }}')
+        outer = backend.from_string('лента: {{ cards }}')
+        timer = RequestTimer()
+        token = current.set(timer)
+        try:
+            with mock.patch('core.perf.time.perf_counter',
+                            side_effect=lambda: clock[0]):
+                outer.render({'cards': lambda: inner.render(
+                    {'card': slow_card})})
+        finally:
+            current.reset(token)
+        self.assertEqual(timer.template, 5)
+
+    def test_endpoint_is_staff_only(self):
+        """Сводка доступна только персоналу."""
+        response = self.client.get('/admin/perfstats/')
+        self.assertEqual(response.status_code, 302)
+        staff = User.objects.create_user(username='staff', is_staff=True)
+        self.client.force_login(staff)
+        self.client.get('/')
+        response = self.client.get('/admin/perfstats/')
+        self.assertEqual(response.json()['posts:index']['count'], 1)
+
+    def test_command_merges_process_snapshots(self):
+        """manage.py perfstats сводит снимки, сохранённые процессами."""
+        with tempfile.TemporaryDirectory() as directory:
+            with self.settings(PERFSTATS_DIR=directory):
+                self.client.get('/')
+                registry.flush()
+                out = StringIO()
+                call_command('perfstats', '--json', stdout=out)
+        summary = json.loads(out.getvalue())
+        self.assertEqual(summary['posts:index']['count'], 1)
+        self.assertIn('p95', summary['posts:index']['queries'])
+
+    def test_concurrent_flushes_leave_one_snapshot(self):
+        """Параллельные сохранения не мешают друг другу."""
+        self.client.get('/')
+        with tempfile.TemporaryDirectory() as directory:
+            with self.settings(PERFSTATS_DIR=directory):
+                threads = [threading.Thread(target=registry.flush)
+                           for _ in range(8)]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+                self.assertEqual(len(os.listdir(directory)), 1)
+                [snapshot] = load_snapshots()
+        self.assertEqual(sum(snapshot['posts:index']['wall_ms']), 1)
+
+    def test_stale_snapshots_pruned(self):
+        """Снимки завершившихся процессов не попадают в сводку."""
+        self.client.get('/')
+        with tempfile.TemporaryDirectory() as directory:
+            with self.settings(PERFSTATS_DIR=directory,
+                               PERFSTATS_FLUSH_INTERVAL=10):
+                registry.flush()
+                stale = os.path.join(directory, 'perfstats-1-dead.json')
+                with open(stale, 'w') as file:
+                    json.dump(registry.snapshot(), file)
+                old = time.time() - 10 * 60
+                os.utime(stale, (old, old))
+                self.assertEqual(len(load_snapshots()), 1)
+                self.assertFalse(os.path.exists(stale))
+
+    def test_snapshot_name_unique_per_process(self):
+        """Процесс с тем же pid пишет снимок в другой файл."""
+        path = registry.snapshot_path('stats')
+        self.assertIn(f'perfstats-{os.getpid()}-', path)
+        registry.owner = None
+        self.assertNotEqual(registry.snapshot_path('stats'), path)
+
+    def test_metrics_failure_does_not_break_request(self):
+        """Сбой записи метрик не ломает ответ."""
+        with mock.patch.object(registry, 'maybe_flush',
+                               side_effect=OSError('Диск заполнен')):
+            with self.assertLogs('core.perf', 'ERROR'):
+                response = self.client.get('/')
+        self.assertEqual(response.status_code, 200)
+
+
+@override_settings(READ_POOL_SIZE=2)
+class GatherTests(TransactionTestCase):
+    def test_reads_run_in_pool_threads(self):
+        """Независимые чтения уходят в пул потоков со своими соединениями."""
+        User.objects.create_user(username='reader')
+        names = gather(
+            lambda: threading.current_thread().name,
+            lambda: threading.current_thread().name,
+        )
+        self.assertEqual(names[0], threading.current_thread().name)
+        self.assertTrue(names[1].startswith('reads'))
+        self.assertEqual(
+            gather(User.objects.count, User.objects.count), [1, 1])
+
+    def test_transaction_keeps_reads_in_request_thread(self):
+        """В транзакции чтения идут по очереди в текущем потоке."""
+        with transaction.atomic():
+            User.objects.create_user(username='uncommitted')
+            names = gather(
+                lambda: threading.current_thread().name,
+                lambda: User.objects.filter(username='uncommitted').exists(),
+            )
+        self.assertEqual(names, [threading.current_thread().name, True])
+
+
+class SQLiteProfileTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.name = f'{directory.name}/db.sqlite3'
+
+    def connect(self, **pragmas):
+        profile = PRODUCTION_DATABASES['default']
+        options = profile['OPTIONS']
+        connection = ConnectionHandler({'default': {
+            **profile, 'NAME': self.name,
+            'OPTIONS': {**options,
+                        'pragmas': {**options['pragmas'], **pragmas}},
+        }})['default']
+        self.addCleanup(connection.close)
+        return connection
+
+    def test_pragmas_applied_on_connect(self):
+        """Профиль включает WAL и задаёт PRAGMA на новом соединении."""
+        with self.connect().cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            self.assertEqual(cursor.fetchone(), ('wal',))
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone(), (5000,))
+
+    def test_transaction_takes_write_lock_at_begin(self):
+        """Транзакция сразу берёт блокировку записи, а чтение не ждёт."""
+        writer = self.connect()
+        other = self.connect(busy_timeout=0)
+        # Так transaction.atomic() начинает транзакцию в SQLite.
+        writer.set_autocommit(
+            False, force_begin_transaction_with_broken_autocommit=True)
+        try:
+            with other.cursor() as cursor:
+                cursor.execute('SELECT count(*) FROM sqlite_master')
+                with self.assertRaisesMessage(OperationalError, 'locked'):
+                    cursor.execute('BEGIN IMMEDIATE')
+        finally:
+            writer.rollback()
+            writer.set_autocommit(True)
+
+
+class CompressionTests(TestCase):
+    def test_minify_keeps_preformatted_blocks(self):
+        """Отступы схлопываются, а pre и script остаются как были."""
+        html = (b'<ul>\n    <li>  a  </li>\n</ul>\n'
+                b'<pre>  x\n  y</pre>\n  <script>\n  f()\n</script>')
+        self.assertEqual(
+            minify_html(html),
+            b'<ul>\n<li> a </li>\n</ul>\n'
+            b'<pre>  x\n  y</pre>\n<script>\n  f()\n</script>')
+
+    def test_encoding_negotiation(self):
+        """Кодировка выбирается по Accept-Encoding с учётом q."""
+        self.assertEqual(choose_encoding('deflate, gzip;q=0.5'), 'gzip')
+        self.assertEqual(choose_encoding('*'), choose_encoding('br, gzip'))
+        self.assertIsNone(choose_encoding('gzip;q=0'))
+        self.assertIsNone(choose_encoding(''))
+
+    def test_html_response_compressed(self):
+        """Страница отдаётся сжатой, если клиент это умеет."""
+        url = reverse('about:author')
+        plain = self.client.get(url)
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(int(response['Content-Length']),
+                         len(response.content))
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        self.assertNotIn(b'  ', plain.content)
+
+
+class TemplateWarmupTests(SimpleTestCase):
+    @override_settings(TEMPLATES=PRODUCTION_TEMPLATES)
+    def test_warmup_fills_cached_loader(self):
+        """Прогрев кладёт в cached.Loader все шаблоны проекта."""
+        count, errors = warm_templates()
+        self.assertEqual(errors, [])
+        engine = engines.all()[0].engine
+        names = template_names(engine)
+        self.assertIn('posts/includes/post_card.html', names)
+        self.assertIn('base.html', names)
+        cached = engine.template_loaders[0].get_template_cache
+        self.assertEqual(count, len(names))
+        self.assertIn('posts/includes/post_card.html', cached)
+
+    def test_command_reports_count(self):
+        """Команда warm_templates сообщает число шаблонов."""
+        out = StringIO()
+        call_command('warm_templates', stdout=out)
+        self.assertIn('Шаблонов:', out.getvalue())
@@ -0,0 +1,20 @@
+"""Замеры производительности по сценариям: manage.py benchmark.
+
+seed — тестовые данные, scenarios — время и запросы страниц и
+сравнение с базовым замером, throughput — параллельные чтения,
+templates — отрисовка шаблонов, contention — блокировки SQLite.
+"""
+from .contention import compare_sqlite_profiles
+from .scenarios import (
+    DEFAULT_BASELINE, Scenario, build_scenarios, compare, load_baseline, run,
+    save_baseline,
+)
+from .seed import seed_data
+from .templates import render_timings
+from .throughput import compare_read_pool
+
+__all__ = [
+    'DEFAULT_BASELINE', 'Scenario', 'build_scenarios', 'compare',
+    'compare_read_pool', 'compare_sqlite_profiles', 'load_baseline',
+    'render_timings', 'run', 'save_baseline', 'seed_data',
+]
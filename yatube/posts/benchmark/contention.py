@@ -0,0 +1,144 @@
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.db import OperationalError, connection, connections, transaction
+from django.db.models import F
+
+from ..models import Comment, Post, User
+from ..utils import LAST_10_POSTS
+from .scenarios import percentile
+
+
+def sqlite_profiles():
+    """Стандартный бэкенд Django и профиль settings_production."""
+    from yatube.settings_production import DATABASES as production
+    return {
+        'stock': {'ENGINE': 'django.db.backends.sqlite3', 'OPTIONS': {}},
+        'production': {
+            key: production['default'][key] for key in ('ENGINE', 'OPTIONS')
+        },
+    }
+
+
+def copy_database(path):
+    """Копия текущей SQLite БД в файл path."""
+    if connection.vendor != 'sqlite':
+        raise ValueError('Бенчмарк блокировок работает только с SQLite')
+    connection.ensure_connection()
+    target = sqlite3.connect(path)
+    try:
+        connection.connection.backup(target)
+    finally:
+        target.close()
+
+
+@contextmanager
+def database_copy(name, profile):
+    """Алиас временной копии БД, открытой с профилем profile."""
+    alias = f'contention_{name}'
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'db.sqlite3')
+    copy_database(path)
+    connections.databases[alias] = {**profile, 'NAME': path}
+    connections.ensure_defaults(alias)
+    try:
+        yield alias
+    finally:
+        connections[alias].close()
+        del connections[alias]
+        del connections.databases[alias]
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def comment_writer(alias, post_ids, author_id):
+    """Запись как в add_comment: чтение поста, вставка комментария и
+    обновление счётчика в одной транзакции."""
+    def write():
+        post_id = random.choice(post_ids)
+        with transaction.atomic(using=alias):
+            posts = Post.objects.using(alias).filter(pk=post_id)
+            posts.values_list('author_id', flat=True).get()
+            Comment.objects.using(alias).bulk_create([Comment(
+                post_id=post_id, author_id=author_id, text='Бенчмарк')])
+            posts.update(comment_count=F('comment_count') + 1)
+    return write
+
+
+def feed_reader(alias, post_ids):
+    """Чтение: лента и счётчик комментариев поста."""
+    def read():
+        list(Post.objects.using(alias).for_feed().order_by(
+            '-pub_date')[:LAST_10_POSTS])
+        Comment.objects.using(alias).filter(
+            post_id=random.choice(post_ids)).count()
+    return read
+
+
+def timed_operations(alias, operation, count):
+    """Время удачных операций в мс и число упавших на блокировке."""
+    timings = []
+    locked = 0
+    try:
+        for _ in range(count):
+            start = time.perf_counter()
+            try:
+                operation()
+            except OperationalError as error:
+                if 'locked' not in str(error):
+                    raise
+                locked += 1
+                continue
+            timings.append((time.perf_counter() - start) * 1000)
+    finally:
+        connections[alias].close()
+    return timings, locked
+
+
+def outcome_summary(kind, outcomes, elapsed):
+    timings = [timing for timings, _ in outcomes for timing in timings]
+    return {
+        f'{kind}s_per_second': round(len(timings) / elapsed, 1),
+        f'{kind}_locked': sum(locked for _, locked in outcomes),
+        f'{kind}_p95': (
+            round(percentile(timings, 95), 2) if timings else None),
+    }
+
+
+def contention(name, profile, writers, readers, operations):
+    """Одновременные записи и чтения в копию БД с профилем profile.
+
+    Считаются операции, завершившиеся ошибкой «database is locked».
+    """
+    with database_copy(name, profile) as alias:
+        post_ids = list(Post.objects.using(alias).order_by(
+            '-pk').values_list('pk', flat=True)[:1000])
+        author_id = User.objects.using(alias).values_list(
+            'pk', flat=True).first()
+        if not post_ids or author_id is None:
+            raise ValueError('В БД нет данных: сначала запустите seed_posts')
+        tasks = ([comment_writer(alias, post_ids, author_id)] * writers
+                 + [feed_reader(alias, post_ids)] * readers)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(len(tasks)) as pool:
+            outcomes = list(pool.map(
+                lambda task: timed_operations(alias, task, operations),
+                tasks))
+        elapsed = time.perf_counter() - start
+    return {
+        **outcome_summary('write', outcomes[:writers], elapsed),
+        **outcome_summary('read', outcomes[writers:], elapsed),
+    }
+
+
+def compare_sqlite_profiles(writers, readers, operations):
+    """Блокировки и пропускная способность: stock против production."""
+    return {
+        name: contention(name, profile, writers, readers, operations)
+        for name, profile in sqlite_profiles().items()
+    }
@@ -0,0 +1,135 @@
+import json
+import os
+import time
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.test import Client
+from django.urls import reverse
+
+from core.perf import RequestTimer
+
+from ..models import AuthorStats, Group, Post, User
+from ..utils import LAST_10_POSTS, encode_cursor
+
+DEFAULT_BASELINE = os.path.join(
+    settings.BASE_DIR, 'benchmark-baseline.json')
+PERCENTILES = (50, 95, 99)
+
+
+class Scenario:
+    """Один измеряемый запрос к сайту."""
+
+    def __init__(self, name, url, method='get', data=None, login=True):
+        self.name = name
+        self.url = url
+        self.method = method
+        self.data = data
+        self.login = login
+
+    def request(self, client):
+        if self.method == 'post':
+            # Запись откатывается, чтобы прогоны не меняли данные.
+            with transaction.atomic():
+                response = client.post(self.url, self.data)
+                transaction.set_rollback(True)
+            return response
+        return client.get(self.url)
+
+
+def build_scenarios():
+    """Сценарии на самых нагруженных объектах текущей БД."""
+    author = AuthorStats.objects.select_related('author').order_by(
+        '-post_count').first()
+    group = Group.objects.order_by('-post_count').first()
+    post = Post.objects.order_by('-comment_count', '-pk').first()
+    if author is None or group is None or post is None:
+        raise ValueError('В БД нет данных: сначала запустите seed_posts')
+    total = Post.objects.count()
+    deep_page = max(total // LAST_10_POSTS // 2, 1)
+    middle = Post.objects.order_by('-pub_date', '-pk')[
+        min(deep_page * LAST_10_POSTS, total - 1)]
+    index = reverse('posts:index')
+    return [
+        Scenario('index', index),
+        Scenario('index_anonymous', index, login=False),
+        Scenario('index_deep_page', f'{index}?page={deep_page}'),
+        Scenario('index_deep_cursor',
+                 f'{index}?after={encode_cursor(middle)}'),
+        Scenario('group_posts',
+                 reverse('posts:group_list', args=[group.slug])),
+        Scenario('profile',
+                 reverse('posts:profile', args=[author.author.username])),
+        Scenario('post_detail',
+                 reverse('posts:post_detail', args=[post.pk])),
+        Scenario('add_comment',
+                 reverse('posts:add_comment', args=[post.pk]),
+                 method='post', data={'text': 'Бенчмарк'}),
+    ]
+
+
+def percentile(values, percent):
+    ordered = sorted(values)
+    index = min(int(len(ordered) * percent / 100), len(ordered) - 1)
+    return ordered[index]
+
+
+def run_scenario(scenario, iterations, warmup, user):
+    client = Client()
+    if scenario.login:
+        client.force_login(user)
+    for _ in range(warmup):
+        scenario.request(client)
+    # CaptureQueriesContext не подходит: request_started очищает лог.
+    timer = RequestTimer()
+    with connection.execute_wrapper(timer):
+        response = scenario.request(client)
+    if response.status_code >= 400:
+        raise ValueError(
+            f'{scenario.name}: ответ {response.status_code}')
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        scenario.request(client)
+        timings.append((time.perf_counter() - start) * 1000)
+    result = {
+        f'p{percent}': round(percentile(timings, percent), 2)
+        for percent in PERCENTILES
+    }
+    result['queries'] = timer.queries
+    return result
+
+
+def run(scenarios, iterations, warmup):
+    user = User.objects.order_by('pk').first()
+    return {
+        scenario.name: run_scenario(scenario, iterations, warmup, user)
+        for scenario in scenarios
+    }
+
+
+def compare(results, baseline, threshold):
+    """Регрессии относительно базового замера: p95 и число запросов."""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if result['p95'] > base['p95'] * (1 + threshold):
+            regressions.append(
+                f'{name}: p95 {result["p95"]} мс, было {base["p95"]} мс')
+        if result['queries'] > base['queries']:
+            regressions.append(
+                f'{name}: {result["queries"]} запросов, '
+                f'было {base["queries"]}')
+    return regressions
+
+
+def load_baseline(path):
+    with open(path) as file:
+        return json.load(file)
+
+
+def save_baseline(path, results):
+    with open(path, 'w') as file:
+        json.dump(results, file, indent=2, sort_keys=True)
@@ -0,0 +1,76 @@
+import random
+from datetime import timedelta
+
+from django.utils import timezone
+from faker import Faker
+
+from ..bulk import BULK_CHUNK_SIZE, chunks, explicit_dates, rebuild_derived
+from ..models import Comment, Group, Post, User
+
+TEXT_POOL_SIZE: int = 1000
+SEED_PERIOD = timedelta(days=3 * 365)
+
+
+def seed_data(posts, users, groups, comments, seed=0, log=None):
+    """Заполняет БД детерминированным набором данных для бенчмарков.
+
+    Тексты берутся из заранее сгенерированного Faker пула: генерация
+    10^6 отдельных абзацев заняла бы больше времени, чем сама вставка.
+    Производные данные пересобираются в конце через rebuild_derived().
+    """
+    rng = random.Random(seed)
+    fake = Faker('ru_RU')
+    fake.seed_instance(seed)
+    texts = [fake.paragraph(nb_sentences=rng.randint(1, 6))
+             for _ in range(TEXT_POOL_SIZE)]
+    log = log or (lambda message: None)
+
+    prefix = f'bench{seed}'
+    User.objects.bulk_create(
+        (User(username=f'{prefix}_{i}', password='!',
+              first_name=fake.first_name(), last_name=fake.last_name())
+         for i in range(users)),
+        ignore_conflicts=True)
+    user_ids = list(User.objects.filter(
+        username__startswith=f'{prefix}_').values_list('pk', flat=True))
+    Group.objects.bulk_create(
+        (Group(title=f'{fake.word().capitalize()} {i}',
+               slug=f'{prefix}-{i}', description=rng.choice(texts))
+         for i in range(groups)),
+        ignore_conflicts=True)
+    group_ids = list(Group.objects.filter(
+        slug__startswith=f'{prefix}-').values_list('pk', flat=True))
+    log(f'Пользователей: {len(user_ids)}, групп: {len(group_ids)}')
+
+    now = timezone.now()
+    start = now - SEED_PERIOD
+    step = SEED_PERIOD / max(posts, 1)
+    last_id = Post.objects.order_by('-pk').values_list(
+        'pk', flat=True).first() or 0
+    new_posts = (
+        Post(text=rng.choice(texts), author_id=rng.choice(user_ids),
+             group_id=rng.choice(group_ids)
+             if group_ids and rng.random() < 0.7 else None,
+             pub_date=pub_date, updated_at=pub_date)
+        for pub_date in (start + step * i for i in range(posts))
+    )
+    for number, chunk in enumerate(chunks(new_posts), 1):
+        with explicit_dates(Post):
+            Post.objects.bulk_create(chunk)
+        log(f'Постов: {min(number * BULK_CHUNK_SIZE, posts)}')
+    post_dates = list(Post.objects.filter(pk__gt=last_id).values_list(
+        'pk', 'pub_date'))
+    new_comments = (
+        Comment(post_id=post_id, author_id=rng.choice(user_ids),
+                text=rng.choice(texts),
+                pub_date=min(now, pub_date + timedelta(
+                    minutes=rng.randint(1, 3 * 24 * 60))))
+        for post_id, pub_date in (
+            rng.choice(post_dates) for _ in range(comments))
+    ) if post_dates else ()
+    for number, chunk in enumerate(chunks(new_comments), 1):
+        with explicit_dates(Comment):
+            Comment.objects.bulk_create(chunk)
+        log(f'Комментариев: {min(number * BULK_CHUNK_SIZE, comments)}')
+
+    rebuild_derived()
@@ -0,0 +1,58 @@
+from django.conf import settings
+from django.test import Client, override_settings
+
+from core.templates import template_timings, warm_templates
+
+from ..models import User
+
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+LOADER_PROFILES = {
+    'uncached': TEMPLATE_LOADERS,
+    'cached': [('django.template.loaders.cached.Loader', TEMPLATE_LOADERS)],
+}
+
+
+def templates_with(loaders):
+    """settings.TEMPLATES с другими загрузчиками шаблонов."""
+    return [
+        {**backend, 'APP_DIRS': False,
+         'OPTIONS': {**backend.get('OPTIONS', {}), 'loaders': loaders}}
+        for backend in settings.TEMPLATES
+    ]
+
+
+def render_timings(scenarios, iterations):
+    """Среднее время отрисовки каждого шаблона без кэша загрузчика
+    и с cached.Loader после прогрева, как в settings_production.
+
+    Каждый профиль начинает с пустого кэша, чтобы страницы и карточки,
+    закэшированные первым прогоном, не сократили работу второго.
+    """
+    user = User.objects.order_by('pk').first()
+    results = {}
+    for profile, loaders in LOADER_PROFILES.items():
+        caches = {'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': f'benchmark-templates-{profile}',
+        }}
+        with override_settings(TEMPLATES=templates_with(loaders),
+                               CACHES=caches):
+            warm_templates()
+            with template_timings() as stats:
+                for scenario in scenarios:
+                    if scenario.method != 'get':
+                        continue
+                    client = Client()
+                    if scenario.login:
+                        client.force_login(user)
+                    for _ in range(iterations):
+                        scenario.request(client)
+        for name, entry in stats.items():
+            result = results.setdefault(name, {'renders': entry['renders']})
+            result[f'{profile}_ms'] = round(
+                entry['render_ms'] / max(entry['renders'], 1), 3)
+            result[f'{profile}_compiles'] = entry['compiles']
+    return results
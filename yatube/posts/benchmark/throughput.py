@@ -0,0 +1,79 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.test import Client, override_settings
+
+from ..models import User
+
+
+@contextmanager
+def simulated_latency(milliseconds):
+    """Добавляет задержку к каждому запросу новых соединений с БД.
+
+    Так SQLite в том же процессе ведёт себя как сетевая СУБД: пока
+    запрос «в пути», поток отпускает GIL.
+    """
+    patched = []
+
+    def delay(execute, sql, params, many, context):
+        time.sleep(milliseconds / 1000)
+        return execute(sql, params, many, context)
+
+    def install(sender, connection, **kwargs):
+        if delay not in connection.execute_wrappers:
+            connection.execute_wrappers.append(delay)
+            patched.append(connection)
+
+    if milliseconds:
+        connection_created.connect(install)
+    try:
+        yield
+    finally:
+        connection_created.disconnect(install)
+        for conn in patched:
+            if delay in conn.execute_wrappers:
+                conn.execute_wrappers.remove(delay)
+
+
+def throughput(scenario, workers, requests, user):
+    """Запросов в секунду при workers одновременных обработчиках."""
+    def work(count):
+        client = Client()
+        if scenario.login:
+            client.force_login(user)
+        try:
+            for _ in range(count):
+                scenario.request(client)
+        finally:
+            connection.close()
+
+    per_worker = max(requests // workers, 1)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(workers) as pool:
+        list(pool.map(work, [per_worker] * workers))
+    return per_worker * workers / (time.perf_counter() - start)
+
+
+def compare_read_pool(scenarios, workers, requests, latency=0):
+    """Пропускная способность с параллельными чтениями и без них.
+
+    Число обработчиков одинаковое, меняется только READ_POOL_SIZE.
+    """
+    user = User.objects.order_by('pk').first()
+    results = {}
+    for scenario in scenarios:
+        if scenario.method != 'get':
+            continue
+        with simulated_latency(latency):
+            with override_settings(READ_POOL_SIZE=0):
+                sequential = throughput(scenario, workers, requests, user)
+            concurrent = throughput(scenario, workers, requests, user)
+        results[scenario.name] = {
+            'sequential_rps': round(sequential, 1),
+            'concurrent_rps': round(concurrent, 1),
+            'gain': round(concurrent / sequential - 1, 3),
+        }
+    return results
@@ -0,0 +1,88 @@
+import logging
+import threading
+from contextlib import contextmanager
+
+from .cache import forget_page_changes, invalidate_index_pages
+from .counters import recount_all
+from .models import Post
+from .search import rebuild_index
+from .thumbnails import generate_thumbnails
+from .timeline import rebuild_timelines
+
+logger = logging.getLogger(__name__)
+
+BULK_CHUNK_SIZE: int = 5000
+
+dates_lock = threading.RLock()
+# Поле -> исходные (auto_now, auto_now_add), пока флаги сняты.
+overridden_dates = {}
+
+
+@contextmanager
+def explicit_dates(*models):
+    """Позволяет bulk_create записать свои даты вместо auto_now(_add).
+
+    Флаги полей общие для всего процесса, поэтому они снимаются только
+    на время блока и под блокировкой, а вложенный вызов не трогает уже
+    снятые. Блок стоит держать вокруг самого bulk_create.
+    """
+    with dates_lock:
+        fields = [
+            field for model in models
+            for field in model._meta.concrete_fields
+            if field not in overridden_dates and (
+                getattr(field, 'auto_now', False)
+                or getattr(field, 'auto_now_add', False))
+        ]
+        for field in fields:
+            overridden_dates[field] = (field.auto_now, field.auto_now_add)
+            field.auto_now = field.auto_now_add = False
+        try:
+            yield
+        finally:
+            for field in fields:
+                field.auto_now, field.auto_now_add = (
+                    overridden_dates.pop(field))
+
+
+def chunks(objects, size=BULK_CHUNK_SIZE):
+    chunk = []
+    for obj in objects:
+        chunk.append(obj)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def rebuild_derived():
+    """Обновляет то, что сигналы ведут при одиночных сохранениях.
+
+    bulk_create сигналов не посылает, поэтому после массовой загрузки
+    счётчики, поисковый индекс, ленты подписок, кэш ленты и отметки
+    изменения страниц пересобираются целиком, а для картинок без
+    миниатюр ставится генерация.
+    """
+    recount_all()
+    rebuild_index()
+    rebuild_timelines()
+    queue_thumbnails()
+    invalidate_index_pages()
+    forget_page_changes()
+
+
+def queue_thumbnails():
+    """Ставит генерацию миниатюр для картинок, у которых их ещё нет."""
+    names = list(
+        Post.objects.exclude(image='').filter(thumbnails_ready=False)
+        .order_by().values_list('image', flat=True).distinct()
+    )
+    for name in names:
+        try:
+            generate_thumbnails.delay(name)
+        except Exception:
+            # С TASKS_SYNC генерация идёт сразу: битая картинка одного
+            # поста не должна обрывать пересборку.
+            logger.exception('Не удалось создать миниатюры для %s', name)
+    return len(names)
@@ -0,0 +1,116 @@
+import hashlib
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.core.cache import cache
+from django.utils import timezone
+
+from core.db import pin_to_primary
+
+from .models import Group, PageChange
+
+INDEX_PAGE_TIMEOUT: int = 60 * 15
+INDEX_GENERATION_KEY = 'posts:index:generation'
+INDEX_PAGE_PARAMS = ('page', 'after', 'before')
+# Отметки изменения нет: ETag есть, а Last-Modified не отдаётся.
+NEVER_CHANGED: float = 0.0
+
+
+def index_page_key(request):
+    """Ключ страницы главной ленты в текущем поколении кэша.
+
+    Поколение в кэше процесса сбрасывается записями в этом процессе,
+    отметка изменения ленты из БД — записями в любом.
+    """
+    generation = cache.get(INDEX_GENERATION_KEY, 0)
+    changed = getattr(request, '_page_changed', None)
+    if changed is None:
+        changed = last_changed('index')
+    page = ':'.join(request.GET.get(param, '') for param in INDEX_PAGE_PARAMS)
+    return f'posts:index:{generation}:{changed!r}:{page}'
+
+
+def invalidate_index_pages():
+    """Сбрасывает все закэшированные страницы ленты разом."""
+    try:
+        cache.incr(INDEX_GENERATION_KEY)
+    except ValueError:
+        cache.set(INDEX_GENERATION_KEY, 1, None)
+
+
+def touch_pages(*scopes):
+    """Отмечает, что страницы из scopes изменились только что."""
+    scopes = {scope for scope in scopes if scope}
+    if not scopes:
+        return
+    now = timezone.now()
+    PageChange.objects.bulk_create(
+        [PageChange(scope=scope, changed=now) for scope in scopes],
+        ignore_conflicts=True)
+    PageChange.objects.filter(scope__in=scopes).update(changed=now)
+
+
+def post_page_scopes(post):
+    """Страницы, на которых виден пост."""
+    group_ids = {post.group_id, getattr(post, '_previous_group_id', None)}
+    slugs = Group.objects.filter(pk__in=group_ids - {None}).values_list(
+        'slug', flat=True)
+    return [
+        'index', f'post:{post.pk}', f'profile:{post.author.username}',
+        *(f'group:{slug}' for slug in slugs),
+    ]
+
+
+def forget_page_changes():
+    """После записи в обход сигналов все страницы считаются изменёнными.
+
+    Отметки не удаляются, а сдвигаются: иначе Last-Modified пропал бы,
+    и If-Modified-Since от старой копии некому было бы опровергнуть.
+    """
+    PageChange.objects.update(changed=timezone.now())
+
+
+def last_changed(*scopes):
+    """Время последнего изменения страниц из scopes, в секундах.
+
+    Отметки общие для всех процессов. Страницы без отметок ещё не
+    менялись с их появления или со сброса отметок: для них время
+    неизвестно и равно NEVER_CHANGED.
+    """
+    changes = PageChange.objects.filter(
+        scope__in=scopes).values_list('changed', flat=True)
+    return max((changed.timestamp() for changed in changes),
+               default=NEVER_CHANGED)
+
+
+def page_validators(scopes):
+    """etag_func и last_modified_func для декоратора condition.
+
+    scopes(request, **kwargs) называет, от чего зависит страница.
+    Пользователь берётся из сессии без запроса к таблице пользователей:
+    шапка и кнопки у каждого свои, поэтому он входит в ETag.
+    """
+    def changed(request, **kwargs):
+        if not hasattr(request, '_page_changed'):
+            request._page_changed = last_changed(*scopes(request, **kwargs))
+            # Реплика могла ещё не получить изменение: иначе устаревшая
+            # страница попала бы в кэш и под новый ETag.
+            age = time.time() - request._page_changed
+            if age < settings.READ_YOUR_WRITES_SECONDS:
+                pin_to_primary()
+        return request._page_changed
+
+    def etag(request, **kwargs):
+        user = request.session.get(SESSION_KEY, '')
+        state = f'{user}:{changed(request, **kwargs)!r}'
+        return hashlib.md5(state.encode()).hexdigest()
+
+    def last_modified(request, **kwargs):
+        timestamp = changed(request, **kwargs)
+        if timestamp == NEVER_CHANGED:
+            return None
+        return datetime.fromtimestamp(int(timestamp), dt_timezone.utc)
+
+    return {'etag_func': etag, 'last_modified_func': last_modified}
@@ -0,0 +1,52 @@
+import hashlib
+
+from django.core.cache import cache
+from django.template.loader import get_template
+from django.utils.safestring import mark_safe
+
+CARD_TEMPLATE = 'posts/includes/post_card.html'
+CARD_TIMEOUT: int = 60 * 60 * 24
+# Поднять при изменении post_card.html, чтобы не отдавать старую разметку.
+CARD_VERSION: int = 1
+
+
+def card_key(post):
+    """Ключ карточки: id поста и версия всего, что в ней показано.
+
+    updated_at меняется при каждой правке поста. Имя автора и слаг
+    группы входят в хеш, поэтому переименование тоже даёт новый ключ.
+    """
+    group_slug = post.group.slug if post.group_id else ''
+    state = '|'.join((
+        post.updated_at.isoformat(), post.author.username,
+        post.author.get_full_name(), group_slug, post.image.name or '',
+    ))
+    digest = hashlib.md5(state.encode()).hexdigest()
+    return f'posts:card:{CARD_VERSION}:{post.pk}:{digest}'
+
+
+def cacheable(post):
+    # Пока миниатюр нет, в карточке исходная картинка: такую не храним,
+    # после генерации она отрисуется заново уже с srcset.
+    return not post.image or post.thumbnails_ready
+
+
+def render_cards(posts):
+    """HTML карточек постов: готовые из кэша, остальные отрисовываются.
+
+    Кэш читается и пишется одним запросом на всю страницу.
+    """
+    posts = list(posts)
+    keys = [card_key(post) for post in posts]
+    cards = cache.get_many(keys)
+    template = get_template(CARD_TEMPLATE)
+    rendered = {}
+    for post, key in zip(posts, keys):
+        if key in cards:
+            continue
+        cards[key] = template.render({'post': post})
+        if cacheable(post):
+            rendered[key] = cards[key]
+    if rendered:
+        cache.set_many(rendered, CARD_TIMEOUT)
+    return [mark_safe(cards[key]) for key in keys]
@@ -0,0 +1,69 @@
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import AuthorStats, Comment, Follow, Group, Post, User
+
+
+def shift(queryset, field, delta):
+    # Счётчик не уходит ниже нуля, даже если успел разойтись с данными.
+    if delta < 0:
+        queryset = queryset.filter(**{f'{field}__gte': -delta})
+    return queryset.update(**{field: F(field) + delta})
+
+
+def change_author_stats(author_id, field, delta):
+    updated = shift(
+        AuthorStats.objects.filter(author_id=author_id), field, delta)
+    if not updated and delta > 0:
+        AuthorStats.objects.create(
+            author_id=author_id,
+            post_count=Post.objects.filter(author_id=author_id).count(),
+            follower_count=Follow.objects.filter(author_id=author_id).count())
+
+
+def change_author_posts(author_id, delta):
+    change_author_stats(author_id, 'post_count', delta)
+
+
+def change_author_followers(author_id, delta):
+    change_author_stats(author_id, 'follower_count', delta)
+
+
+def change_group_posts(group_id, delta):
+    if group_id is not None:
+        shift(Group.objects.filter(pk=group_id), 'post_count', delta)
+
+
+def change_post_comments(post_id, delta):
+    if post_id is not None:
+        shift(Post.objects.filter(pk=post_id), 'comment_count', delta)
+
+
+def author_post_count(author):
+    """Число постов автора из счётчика, без COUNT(*) по постам."""
+    stats = getattr(author, 'post_stats', None)
+    return stats.post_count if stats is not None else 0
+
+
+def count_subquery(model, field):
+    counts = model.objects.filter(**{field: OuterRef('pk')}).order_by()
+    counts = counts.values(field).annotate(total=Count('pk'))
+    return Coalesce(Subquery(counts.values('total')), 0)
+
+
+@transaction.atomic
+def recount_all():
+    """Пересчитывает все счётчики с нуля."""
+    Group.objects.update(post_count=count_subquery(Post, 'group'))
+    Post.objects.update(comment_count=count_subquery(Comment, 'post'))
+    AuthorStats.objects.all().delete()
+    authors = User.objects.annotate(
+        post_count=count_subquery(Post, 'author'),
+        follower_count=count_subquery(Follow, 'author'),
+    ).values_list('pk', 'post_count', 'follower_count')
+    AuthorStats.objects.bulk_create(
+        AuthorStats(author_id=author_id, post_count=post_count,
+                    follower_count=follower_count)
+        for author_id, post_count, follower_count in authors
+    )
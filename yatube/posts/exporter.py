@@ -0,0 +1,126 @@
+import csv
+import io
+import json
+import zlib
+
+from .importer import KINDS
+from .models import Comment, Group, Post, User
+
+EXPORT_CHUNK_SIZE: int = 2000
+# Сколько текста копить перед отдачей, чтобы не писать по строке.
+EXPORT_BUFFER_SIZE: int = 64 * 1024
+
+# Поля в формате, который понимает import_posts.
+EXPORTS = {
+    'user': (User.objects.all(), {
+        'username': 'username',
+        'first_name': 'first_name',
+        'last_name': 'last_name',
+        'email': 'email',
+    }),
+    'group': (Group.objects.all(), {
+        'slug': 'slug',
+        'title': 'title',
+        'description': 'description',
+    }),
+    'post': (Post.objects.all(), {
+        'id': 'id',
+        'text': 'text',
+        'author': 'author__username',
+        'group': 'group__slug',
+        'pub_date': 'pub_date',
+        'updated_at': 'updated_at',
+        'image': 'image',
+    }),
+    'comment': (Comment.objects.all(), {
+        'id': 'id',
+        'post': 'post_id',
+        'author': 'author__username',
+        'text': 'text',
+        'pub_date': 'pub_date',
+    }),
+}
+CSV_FIELDS = ['kind'] + list(dict.fromkeys(
+    field for _, fields in EXPORTS.values() for field in fields))
+
+
+def iterate_by_pk(queryset, columns, chunk_size=EXPORT_CHUNK_SIZE):
+    """Строки таблицы порциями по возрастанию pk.
+
+    Каждая порция — отдельный короткий запрос по индексу, поэтому
+    память не растёт, а долгий ответ не держит открытый курсор.
+    """
+    last_pk = 0
+    while True:
+        rows = list(queryset.filter(pk__gt=last_pk).order_by('pk')
+                    .values_list('pk', *columns)[:chunk_size])
+        for row in rows:
+            yield row[1:]
+        if len(rows) < chunk_size:
+            return
+        last_pk = rows[-1][0]
+
+
+def export_records(kinds=KINDS, chunk_size=EXPORT_CHUNK_SIZE):
+    """Записи (kind, dict) в порядке, в котором их загрузит импорт."""
+    for kind in KINDS:
+        if kind not in kinds:
+            continue
+        queryset, fields = EXPORTS[kind]
+        names = list(fields)
+        for row in iterate_by_pk(queryset, fields.values(), chunk_size):
+            record = dict(zip(names, row))
+            for field in ('pub_date', 'updated_at'):
+                if record.get(field) is not None:
+                    record[field] = record[field].isoformat()
+            yield kind, record
+
+
+def render_jsonl(records):
+    for kind, record in records:
+        yield json.dumps({'kind': kind, **record}, ensure_ascii=False) + '\n'
+
+
+def render_csv(records):
+    line = io.StringIO()
+    writer = csv.DictWriter(line, CSV_FIELDS, extrasaction='ignore')
+    writer.writeheader()
+    for kind, record in records:
+        writer.writerow({'kind': kind, **record})
+        yield line.getvalue()
+        line.seek(0)
+        line.truncate()
+    yield line.getvalue()
+
+
+RENDERERS = {'jsonl': render_jsonl, 'csv': render_csv}
+
+
+def buffered(lines, size=EXPORT_BUFFER_SIZE):
+    buffer = []
+    length = 0
+    for line in lines:
+        buffer.append(line)
+        length += len(line)
+        if length >= size:
+            yield ''.join(buffer)
+            buffer = []
+            length = 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+def gzipped(chunks):
+    """Потоковое gzip-сжатие: тот же формат, что у gzip.open."""
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode())
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_stream(format='jsonl', compress=False, kinds=KINDS):
+    """Куски выгрузки: str без сжатия, bytes с gzip."""
+    chunks = buffered(RENDERERS[format](export_records(kinds)))
+    return gzipped(chunks) if compress else chunks
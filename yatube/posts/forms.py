@@ -1,6 +1,7 @@
 from django import forms
 
 from .models import Post, Comment
+from .thumbnails import generate_thumbnails
 
 
 class PostForm(forms.ModelForm):
@@ -14,6 +15,12 @@ class PostForm(forms.ModelForm):
             raise forms.ValidationError('Вы обязательно должны ввести текст!')
         return data
 
+    def save(self, commit=True):
+        post = super().save(commit)
+        if commit and 'image' in self.changed_data and post.image:
+            generate_thumbnails.delay(post.image.name)
+        return post
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
@@ -0,0 +1,286 @@
+import csv
+import gzip
+import json
+import os
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.hashers import make_password
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .bulk import chunks, explicit_dates, rebuild_derived
+from .models import Comment, Group, Post, User
+
+IMPORT_CHUNK_SIZE: int = 1000
+LOOKUP_CACHE_SIZE: int = 100000
+LOOKUP_BATCH_SIZE: int = 500
+MAX_REPORTED_ERRORS: int = 20
+
+MODELS = {'user': User, 'group': Group, 'post': Post, 'comment': Comment}
+KINDS = tuple(MODELS)
+# Что нужно записать раньше, чтобы ссылки в порции разрешились.
+DEPENDENCIES = {
+    'user': (),
+    'group': (),
+    'post': ('user', 'group'),
+    'comment': ('user', 'post'),
+}
+# Поле, по которому повторная запись совпадает с уже загруженной.
+UNIQUE_FIELDS = {'user': 'username', 'group': 'slug', 'post': 'pk',
+                 'comment': 'pk'}
+
+
+def open_text(path, mode='r'):
+    if path.endswith('.gz'):
+        return gzip.open(path, f'{mode}t', encoding='utf-8', newline='')
+    return open(path, mode, encoding='utf-8', newline='')
+
+
+def read_records(path, kind=None):
+    """Построчно читает JSONL или CSV, не загружая файл целиком.
+
+    Тип записи берётся из поля kind, из аргумента или из имени файла:
+    posts.csv, comments.jsonl.gz и т.п.
+    """
+    name = os.path.basename(path)
+    if name.endswith('.gz'):
+        name = name[:-3]
+    stem, extension = os.path.splitext(name)
+    default_kind = kind or stem.rstrip('s')
+    with open_text(path) as file:
+        if extension == '.csv':
+            rows = csv.DictReader(file)
+            for line, record in enumerate(rows, 2):
+                yield line, record.get('kind') or default_kind, record
+            return
+        for line, text in enumerate(file, 1):
+            if not text.strip():
+                continue
+            try:
+                record = json.loads(text)
+            except ValueError:
+                yield line, None, None
+                continue
+            yield line, record.get('kind') or default_kind, record
+
+
+class LookupCache:
+    """Ключ -> pk, недостающие ключи подгружаются пачками."""
+
+    def __init__(self, model, field):
+        self.model = model
+        self.field = field
+        self.keys = {}
+
+    def resolve(self, keys):
+        missing = list({key for key in keys if key and key not in self.keys})
+        if len(self.keys) + len(missing) > LOOKUP_CACHE_SIZE:
+            self.keys.clear()
+        for start in range(0, len(missing), LOOKUP_BATCH_SIZE):
+            batch = missing[start:start + LOOKUP_BATCH_SIZE]
+            self.keys.update(self.model.objects.filter(
+                **{f'{self.field}__in': batch}
+            ).values_list(self.field, 'pk'))
+
+    def get(self, key):
+        return self.keys.get(key)
+
+
+def parse_date(value, default=None):
+    date = parse_datetime(value) if value else None
+    if date is None:
+        return default or timezone.now()
+    if timezone.is_naive(date):
+        return timezone.make_aware(date)
+    return date
+
+
+def parse_id(value):
+    try:
+        return int(value) if value not in (None, '') else None
+    except (TypeError, ValueError):
+        return None
+
+
+class Importer:
+    """Загружает записи порциями через bulk_create.
+
+    Повторный импорт того же файла ничего не дублирует: уже
+    загруженные пользователи, группы, посты и комментарии с id
+    отбрасываются до вставки и не входят в processed.
+    """
+
+    def __init__(self, images=None, chunk_size=IMPORT_CHUNK_SIZE,
+                 workers=4, log=None):
+        self.images = images
+        self.chunk_size = chunk_size
+        self.pool = ThreadPoolExecutor(workers) if workers > 1 else None
+        self.log = log or (lambda message: None)
+        self.buffers = {kind: [] for kind in KINDS}
+        self.users = LookupCache(User, 'username')
+        self.groups = LookupCache(Group, 'slug')
+        self.posts = LookupCache(Post, 'pk')
+        self.processed = Counter()
+        self.skipped = 0
+
+    def skip(self, where, reason):
+        self.skipped += 1
+        if self.skipped <= MAX_REPORTED_ERRORS:
+            self.log(f'{where}: {reason}, запись пропущена')
+
+    def import_file(self, path, kind=None):
+        for line, record_kind, record in read_records(path, kind):
+            where = f'{path}:{line}'
+            if record is None:
+                self.skip(where, 'некорректный JSON')
+            elif record_kind not in KINDS:
+                self.skip(where, f'неизвестный тип {record_kind!r}')
+            else:
+                self.add(record_kind, where, record)
+
+    def add(self, kind, where, record):
+        buffer = self.buffers[kind]
+        buffer.append((where, record))
+        if len(buffer) >= self.chunk_size:
+            self.flush(kind)
+
+    def flush(self, kind):
+        for dependency in DEPENDENCIES[kind]:
+            self.flush(dependency)
+        rows, self.buffers[kind] = self.buffers[kind], []
+        if not rows:
+            return
+        objects = self.new_objects(
+            kind, getattr(self, f'build_{kind}s')(rows))
+        # ignore_conflicts остаётся на случай параллельной записи.
+        with explicit_dates(MODELS[kind]), transaction.atomic():
+            MODELS[kind].objects.bulk_create(objects, ignore_conflicts=True)
+        self.processed[kind] += len(objects)
+
+    def new_objects(self, kind, objects):
+        """Объекты порции, которых ещё нет в БД, без повторов."""
+        model, field = MODELS[kind], UNIQUE_FIELDS[kind]
+        keys = {getattr(obj, field) for obj in objects} - {None}
+        seen = set()
+        for batch in chunks(keys, LOOKUP_BATCH_SIZE):
+            seen.update(model.objects.filter(
+                **{f'{field}__in': batch}).values_list(field, flat=True))
+        new = []
+        for obj in objects:
+            key = getattr(obj, field)
+            if key is not None:
+                if key in seen:
+                    continue
+                seen.add(key)
+            new.append(obj)
+        return new
+
+    def finish(self):
+        """Дописывает остатки буферов и пересобирает производные данные."""
+        try:
+            for kind in KINDS:
+                self.flush(kind)
+        finally:
+            if self.pool:
+                self.pool.shutdown()
+        rebuild_derived()
+
+    def build_users(self, rows):
+        users = []
+        for where, record in rows:
+            if not record.get('username'):
+                self.skip(where, 'нет username')
+                continue
+            users.append(User(
+                username=record['username'],
+                first_name=record.get('first_name') or '',
+                last_name=record.get('last_name') or '',
+                email=record.get('email') or '',
+                password=make_password(None),
+            ))
+        return users
+
+    def build_groups(self, rows):
+        groups = []
+        for where, record in rows:
+            if not record.get('slug') or not record.get('title'):
+                self.skip(where, 'нет slug или title')
+                continue
+            groups.append(Group(
+                slug=record['slug'], title=record['title'],
+                description=record.get('description') or '',
+            ))
+        return groups
+
+    def build_posts(self, rows):
+        self.users.resolve(record.get('author') for _, record in rows)
+        self.groups.resolve(record.get('group') for _, record in rows)
+        valid = []
+        for where, record in rows:
+            author_id = self.users.get(record.get('author'))
+            group_id = self.groups.get(record.get('group'))
+            if author_id is None:
+                self.skip(where, f'нет автора {record.get("author")!r}')
+            elif record.get('group') and group_id is None:
+                self.skip(where, f'нет группы {record.get("group")!r}')
+            else:
+                valid.append((record, author_id, group_id))
+        images = self.copy_images(
+            [record.get('image') for record, _, _ in valid])
+        posts = []
+        for (record, author_id, group_id), image in zip(valid, images):
+            pub_date = parse_date(record.get('pub_date'))
+            posts.append(Post(
+                id=parse_id(record.get('id')), text=record.get('text') or '',
+                author_id=author_id, group_id=group_id, image=image,
+                pub_date=pub_date,
+                updated_at=parse_date(record.get('updated_at'), pub_date),
+            ))
+        return posts
+
+    def build_comments(self, rows):
+        self.users.resolve(record.get('author') for _, record in rows)
+        self.posts.resolve(parse_id(record.get('post')) for _, record in rows)
+        comments = []
+        for where, record in rows:
+            author_id = self.users.get(record.get('author'))
+            post_id = self.posts.get(parse_id(record.get('post')))
+            if author_id is None or post_id is None:
+                self.skip(where, 'нет автора или поста')
+                continue
+            comments.append(Comment(
+                id=parse_id(record.get('id')),
+                post_id=post_id, author_id=author_id,
+                text=record.get('text') or '',
+                pub_date=parse_date(record.get('pub_date')),
+            ))
+        return comments
+
+    def copy_images(self, names):
+        """Копирует картинки порции в хранилище параллельно.
+
+        Без каталога images имена сохраняются как есть: файлы уже лежат
+        в MEDIA_ROOT.
+        """
+        if not self.images:
+            return [name or '' for name in names]
+        if self.pool:
+            return list(self.pool.map(self.copy_image, names))
+        return [self.copy_image(name) for name in names]
+
+    def copy_image(self, name):
+        if not name:
+            return ''
+        source = os.path.join(self.images, name)
+        if not os.path.isfile(source):
+            self.log(f'Нет файла картинки {source}')
+            return ''
+        if (default_storage.exists(name)
+                and default_storage.size(name) == os.path.getsize(source)):
+            return name
+        with open(source, 'rb') as file:
+            return default_storage.save(name, File(file))
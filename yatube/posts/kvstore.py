@@ -0,0 +1,80 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from sorl.thumbnail.kvstores.cached_db_kvstore import (
+    KVStore as CachedDBKVStore,
+)
+
+LRU_SIZE: int = getattr(settings, 'THUMBNAIL_LRU_SIZE', 1024)
+LRU_TIMEOUT: int = getattr(settings, 'THUMBNAIL_LRU_TIMEOUT', 300)
+
+
+class LRUCache:
+    """Ограниченный по размеру и времени жизни кэш внутри процесса."""
+
+    def __init__(self, size, timeout):
+        self.size = size
+        self.timeout = timeout
+        self.items = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            item = self.items.get(key)
+            if item is None:
+                return None
+            value, expires = item
+            if expires < time.monotonic():
+                del self.items[key]
+                return None
+            self.items.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.items[key] = (value, time.monotonic() + self.timeout)
+            self.items.move_to_end(key)
+            while len(self.items) > self.size:
+                self.items.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.items.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.items.clear()
+
+
+class KVStore(CachedDBKVStore):
+    """Хранилище sorl-thumbnail: LRU процесса, затем кэш Django, затем БД.
+
+    Промахи в LRU не запоминаются, чтобы миниатюра, созданная другим
+    процессом, была видна сразу. Время жизни записи ограничивает
+    устаревание после удаления в соседнем процессе.
+    """
+
+    lru = LRUCache(LRU_SIZE, LRU_TIMEOUT)
+
+    def clear(self, delete_thumbnails=False):
+        self.lru.clear()
+        super().clear(delete_thumbnails)
+
+    def _get_raw(self, key):
+        value = self.lru.get(key)
+        if value is None:
+            value = super()._get_raw(key)
+            if value is not None:
+                self.lru.set(key, value)
+        return value
+
+    def _set_raw(self, key, value):
+        super()._set_raw(key, value)
+        self.lru.set(key, value)
+
+    def _delete_raw(self, *keys):
+        for key in keys:
+            self.lru.delete(key)
+        super()._delete_raw(*keys)
@@ -0,0 +1,105 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import benchmark
+
+
+class Command(BaseCommand):
+    help = 'Замеряет время и число запросов основных страниц'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument('--scenario', action='append',
+                            help='Запустить только этот сценарий')
+        parser.add_argument('--baseline', default=benchmark.DEFAULT_BASELINE,
+                            help='Файл с базовым замером')
+        parser.add_argument('--save-baseline', action='store_true',
+                            help='Записать результат как базовый замер')
+        parser.add_argument('--threshold', type=float, default=0.2,
+                            help='Допустимый рост p95, доля от базового')
+        parser.add_argument('--throughput', action='store_true',
+                            help='Сравнить пропускную способность с '
+                                 'параллельными чтениями и без них')
+        parser.add_argument('--workers', type=int, default=4,
+                            help='Одновременных обработчиков для '
+                                 '--throughput')
+        parser.add_argument('--db-latency', type=float, default=0,
+                            help='Задержка каждого запроса к БД в мс '
+                                 'для --throughput')
+        parser.add_argument('--contention', action='store_true',
+                            help='Сравнить блокировки SQLite при '
+                                 'конкурентной записи: стандартный бэкенд '
+                                 'и профиль settings_production')
+        parser.add_argument('--templates', action='store_true',
+                            help='Время отрисовки по шаблонам без кэша '
+                                 'загрузчика и с cached.Loader')
+        parser.add_argument('--writers', type=int, default=4,
+                            help='Пишущих потоков для --contention')
+        parser.add_argument('--readers', type=int, default=4,
+                            help='Читающих потоков для --contention')
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1:
+            raise CommandError('Нужна хотя бы одна итерация')
+        if options['contention']:
+            mode = contention
+        elif options['templates']:
+            mode = templates
+        elif options['throughput']:
+            mode = throughput
+        else:
+            mode = timings
+        try:
+            mode(self, options)
+        except ValueError as error:
+            raise CommandError(error)
+
+    def write_json(self, results):
+        self.stdout.write(json.dumps(results, indent=2, sort_keys=True))
+
+
+def selected_scenarios(options):
+    scenarios = benchmark.build_scenarios()
+    if options['scenario']:
+        scenarios = [scenario for scenario in scenarios
+                     if scenario.name in options['scenario']]
+    return scenarios
+
+
+def contention(command, options):
+    command.write_json(benchmark.compare_sqlite_profiles(
+        options['writers'], options['readers'], options['iterations']))
+
+
+def templates(command, options):
+    command.write_json(benchmark.render_timings(
+        selected_scenarios(options), options['iterations']))
+
+
+def throughput(command, options):
+    command.write_json(benchmark.compare_read_pool(
+        selected_scenarios(options), options['workers'],
+        options['iterations'] * options['workers'], options['db_latency']))
+
+
+def timings(command, options):
+    """Перцентили и запросы сценариев и сравнение с базовым замером."""
+    results = benchmark.run(
+        selected_scenarios(options), options['iterations'],
+        options['warmup'])
+    command.write_json(results)
+    if options['save_baseline']:
+        benchmark.save_baseline(options['baseline'], results)
+        command.stdout.write(command.style.SUCCESS('Базовый замер сохранён'))
+        return
+    try:
+        baseline = benchmark.load_baseline(options['baseline'])
+    except FileNotFoundError:
+        command.stdout.write('Базового замера нет, сравнение пропущено')
+        return
+    regressions = benchmark.compare(results, baseline, options['threshold'])
+    if regressions:
+        raise CommandError('Регрессии:\n' + '\n'.join(regressions))
+    command.stdout.write(command.style.SUCCESS('Регрессий нет'))
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.exporter import RENDERERS, export_stream
+from posts.importer import KINDS
+
+
+class Command(BaseCommand):
+    help = 'Выгружает пользователей, группы, посты и комментарии потоком'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=RENDERERS, default='jsonl')
+        parser.add_argument('--gzip', action='store_true',
+                            help='Сжать выгрузку; включается для .gz')
+        parser.add_argument('--kind', action='append', choices=KINDS,
+                            help='Выгрузить только эти типы записей')
+        parser.add_argument('--output', default='-',
+                            help='Файл для выгрузки, по умолчанию stdout')
+
+    def handle(self, *args, **options):
+        output = options['output']
+        compress = options['gzip'] or output.endswith('.gz')
+        chunks = export_stream(
+            options['format'], compress, options['kind'] or KINDS)
+        if output == '-':
+            if compress:
+                raise CommandError(
+                    'Сжатую выгрузку пишите в файл: --output export.jsonl.gz')
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
+            return
+        if compress:
+            file = open(output, 'wb')
+        else:
+            file = open(output, 'w', encoding='utf-8', newline='')
+        with file:
+            for chunk in chunks:
+                file.write(chunk)
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from posts.importer import IMPORT_CHUNK_SIZE, KINDS, Importer
+
+
+class Command(BaseCommand):
+    help = 'Загружает пользователей, группы, посты и комментарии из JSONL/CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument('files', nargs='+',
+                            help='Файлы .jsonl/.csv, можно сжатые .gz')
+        parser.add_argument('--kind', choices=KINDS,
+                            help='Тип записей, если его нет в файле')
+        parser.add_argument('--chunk-size', type=int,
+                            default=IMPORT_CHUNK_SIZE)
+        parser.add_argument('--images',
+                            help='Каталог, откуда копировать картинки постов')
+        parser.add_argument('--workers', type=int, default=4,
+                            help='Потоков для копирования картинок')
+
+    def handle(self, *args, **options):
+        importer = Importer(
+            images=options['images'], chunk_size=options['chunk_size'],
+            workers=options['workers'], log=self.stderr.write,
+        )
+        try:
+            for path in options['files']:
+                importer.import_file(path, options['kind'])
+        finally:
+            importer.finish()
+        summary = ', '.join(
+            f'{kind}: {importer.processed[kind]}' for kind in KINDS)
+        self.stdout.write(self.style.SUCCESS(
+            f'Импортировано {summary}; пропущено: {importer.skipped}'))
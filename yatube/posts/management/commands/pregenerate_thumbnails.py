@@ -0,0 +1,45 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+
+from posts.models import Post
+from posts.thumbnails import generate_in_thread, try_generate
+
+CHUNK_SIZE: int = 500
+
+
+class Command(BaseCommand):
+    help = 'Создаёт миниатюры для картинок уже опубликованных постов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=4,
+            help='Число параллельных потоков, 1 — без пула')
+
+    def handle(self, *args, **options):
+        names = (
+            Post.objects.exclude(image='')
+            .values_list('image', flat=True).iterator()
+        )
+        workers = options['workers']
+        pool = ThreadPoolExecutor(max_workers=workers) if workers > 1 else None
+        run = (
+            partial(pool.map, generate_in_thread) if pool
+            else partial(map, try_generate)
+        )
+        done = failed = 0
+        try:
+            # Порциями, чтобы не держать в памяти задачи на все посты сразу.
+            for chunk in iter(lambda: list(islice(names, CHUNK_SIZE)), []):
+                for ok in run(chunk):
+                    if ok:
+                        done += 1
+                    else:
+                        failed += 1
+        finally:
+            if pool:
+                pool.shutdown()
+        self.stdout.write(self.style.SUCCESS(
+            f'Миниатюры готовы: {done}, ошибок: {failed}'))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from posts.benchmark import seed_data
+
+
+class Command(BaseCommand):
+    help = 'Заполняет БД большим набором данных для бенчмарков'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=100000)
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=50)
+        parser.add_argument('--comments', type=int, default=200000)
+        parser.add_argument('--seed', type=int, default=0,
+                            help='Зерно генератора: одинаковые данные')
+
+    def handle(self, *args, **options):
+        seed_data(
+            options['posts'], options['users'], options['groups'],
+            options['comments'], seed=options['seed'],
+            log=self.stdout.write,
+        )
+        self.stdout.write(self.style.SUCCESS('Данные созданы'))
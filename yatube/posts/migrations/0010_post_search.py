@@ -0,0 +1,38 @@
+from django.db import migrations
+
+FTS_TABLE = 'posts_post_fts'
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    Post = apps.get_model('posts', 'Post')
+    with schema_editor.connection.cursor() as cursor:
+        try:
+            cursor.execute(
+                f'CREATE VIRTUAL TABLE {FTS_TABLE} '
+                'USING fts5(text, group_title)')
+        except Exception:
+            # SQLite собран без FTS5: поиск пойдёт по таблице слов.
+            return
+        for post_id, text, group_title in Post.objects.values_list(
+                'pk', 'text', 'group__title').iterator():
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, text, group_title) '
+                'VALUES (%s, %s, %s)', [post_id, text, group_title or ''])
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0009_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 2.2.16 on 2026-10-18 03:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0012_post_history'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PageChange',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(max_length=200, unique=True, verbose_name='Страница')),
+                ('changed', models.DateTimeField(verbose_name='Изменена')),
+            ],
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 2.2.16 on 2026-10-18 03:36
+
+import re
+from collections import Counter
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+FTS_TABLE = 'posts_post_fts'
+TOKEN_RE = re.compile(r'\w+')
+
+
+def fill_search_terms(apps, schema_editor):
+    connection = schema_editor.connection
+    if FTS_TABLE in connection.introspection.table_names():
+        # Поиск идёт через FTS5, таблица слов не используется.
+        return
+    Post = apps.get_model('posts', 'Post')
+    SearchTerm = apps.get_model('posts', 'SearchTerm')
+    terms = []
+    for post_id, text, group_title in Post.objects.values_list(
+            'pk', 'text', 'group__title').iterator():
+        words = TOKEN_RE.findall(f'{text} {group_title or ""}'.lower())
+        terms.extend(
+            SearchTerm(term=term, post_id=post_id, tf=tf)
+            for term, tf in Counter(word[:64] for word in words).items())
+        if len(terms) >= 5000:
+            SearchTerm.objects.bulk_create(terms)
+            terms = []
+    SearchTerm.objects.bulk_create(terms)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0015_post_thumbnails_ready'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchTerm',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64, verbose_name='Слово')),
+                ('tf', models.PositiveIntegerField(verbose_name='Число вхождений')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='posts.Post', verbose_name='Пост')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='searchterm',
+            constraint=models.UniqueConstraint(fields=('term', 'post'), name='unique_search_term'),
+        ),
+        migrations.RunPython(fill_search_terms, migrations.RunPython.noop),
+    ]
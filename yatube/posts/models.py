@@ -1,19 +1,46 @@
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import models, transaction
 
 User = get_user_model()
 TEXT_LEN: int = 15
+# Поля, которые читают posts/includes/post_card.html и кэш карточек.
+POST_CARD_FIELDS = (
+    'id',
+    'text',
+    'pub_date',
+    'updated_at',
+    'image',
+    'thumbnails_ready',
+    'author',
+    'author__username',
+    'author__first_name',
+    'author__last_name',
+    'group',
+    'group__title',
+    'group__slug',
+)
 
 
 class Group(models.Model):
     title = models.CharField(max_length=200, verbose_name='Заголовок')
     slug = models.SlugField(unique=True, verbose_name='Ссылка')
     description = models.TextField(verbose_name='Описание')
+    post_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Число постов'
+    )
 
     def __str__(self):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    def for_feed(self):
+        """Посты для ленты: автор и группа одним JOIN, только нужные поля."""
+        return self.select_related('author', 'group').only(*POST_CARD_FIELDS)
+
+
 class Post(models.Model):
     text = models.TextField(
         'Текст поста',
@@ -21,6 +48,8 @@ class Post(models.Model):
     )
     pub_date = models.DateTimeField(auto_now_add=True,
                                     verbose_name='Дата публикации')
+    updated_at = models.DateTimeField(auto_now=True,
+                                      verbose_name='Дата изменения')
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -41,9 +70,36 @@ class Post(models.Model):
         upload_to='posts/',
         blank=True
     )
+    thumbnails_ready = models.BooleanField(
+        default=False,
+        editable=False,
+        verbose_name='Миниатюры созданы'
+    )
+    comment_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Число комментариев'
+    )
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         ordering = ['-pub_date']
+        indexes = [
+            models.Index(fields=['-pub_date', '-id'],
+                         name='post_pub_date_idx'),
+            models.Index(fields=['group', '-pub_date', '-id'],
+                         name='post_group_pub_date_idx'),
+            models.Index(fields=['author', '-pub_date', '-id'],
+                         name='post_author_pub_date_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        # Сигналы читают прежний текст под блокировкой и пишут версию
+        # в этой же транзакции: параллельная правка ждёт, а не рвёт
+        # цепочку диффов.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
     def __str__(self):
         return self.text[:TEXT_LEN]
@@ -74,6 +130,156 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ['-pub_date']
+        indexes = [
+            models.Index(fields=['post', '-pub_date', '-id'],
+                         name='comment_post_pub_date_idx'),
+        ]
 
     def __str__(self):
         return self.text[:TEXT_LEN]
+
+
+class AuthorStats(models.Model):
+    author = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        related_name='post_stats',
+        verbose_name='Автор'
+    )
+    post_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Число постов'
+    )
+    follower_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Число подписчиков'
+    )
+
+    def __str__(self):
+        return f'{self.author}: {self.post_count}'
+
+
+class Follow(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='follower',
+        verbose_name='Подписчик'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='following',
+        verbose_name='Автор'
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'author'],
+                                    name='unique_follow'),
+            models.CheckConstraint(check=~models.Q(user=models.F('author')),
+                                   name='no_self_follow'),
+        ]
+
+    def __str__(self):
+        return f'{self.user} -> {self.author}'
+
+
+class TimelineEntry(models.Model):
+    """Пост в материализованной ленте подписок пользователя."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Читатель'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Пост'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор'
+    )
+    pub_date = models.DateTimeField(verbose_name='Дата публикации')
+
+    class Meta:
+        ordering = ['-pub_date']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'post'],
+                                    name='unique_timeline_entry'),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-pub_date', '-post'],
+                         name='timeline_user_pub_date_idx'),
+        ]
+
+
+class PostRevision(models.Model):
+    """Прежняя версия текста поста в виде обратного диффа.
+
+    Актуальный текст хранится в самом посте, а diff превращает текст
+    версии number + 1 в текст версии number (см. posts.revisions).
+    """
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='revisions',
+        verbose_name='Пост'
+    )
+    number = models.PositiveIntegerField(verbose_name='Версия')
+    diff = models.TextField(verbose_name='Обратный дифф')
+    created = models.DateTimeField(auto_now_add=True,
+                                   verbose_name='Дата замены')
+
+    class Meta:
+        ordering = ['-number']
+        constraints = [
+            models.UniqueConstraint(fields=['post', 'number'],
+                                    name='unique_post_revision'),
+        ]
+
+    def __str__(self):
+        return f'{self.post_id} v{self.number}'
+
+
+class PageChange(models.Model):
+    """Когда последний раз менялась страница: основа ETag и Last-Modified.
+
+    Отметки лежат в БД, а не в кэше: кэш по умолчанию свой у каждого
+    процесса, и правку из одного воркера другие бы не увидели.
+    """
+    scope = models.CharField('Страница', max_length=200, unique=True)
+    changed = models.DateTimeField('Изменена')
+
+    def __str__(self):
+        return f'{self.scope}: {self.changed}'
+
+
+class SearchTerm(models.Model):
+    """Слово поста в инвертированном индексе поиска без FTS5.
+
+    Строка на пару слово-пост; tf — сколько раз слово встречается
+    в тексте поста и названии его группы.
+    """
+    term = models.CharField('Слово', max_length=64)
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='search_terms',
+        verbose_name='Пост'
+    )
+    tf = models.PositiveIntegerField('Число вхождений')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['term', 'post'],
+                                    name='unique_search_term'),
+        ]
+
+    def __str__(self):
+        return f'{self.term}: {self.post_id}'
@@ -0,0 +1,76 @@
+import json
+import re
+from difflib import SequenceMatcher
+
+from .models import PostRevision
+
+# Слова, пробелы и отдельные знаки: дифф по ним короче посимвольного
+# и точнее построчного для коротких текстов постов.
+TOKEN_RE = re.compile(r'\w+|\s+|.', re.S)
+
+
+def tokens(text):
+    return TOKEN_RE.findall(text)
+
+
+def make_diff(source, target):
+    """Компактный дифф, который строит target из source.
+
+    Список операций в JSON: n >= 0 — взять n токенов source,
+    -n — пропустить n токенов, строка — вставить её.
+    """
+    old, new = tokens(source), tokens(target)
+    ops = []
+    matcher = SequenceMatcher(None, old, new, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            ops.append(i2 - i1)
+            continue
+        if i2 > i1:
+            ops.append(i1 - i2)
+        if j2 > j1:
+            ops.append(''.join(new[j1:j2]))
+    return json.dumps(ops, ensure_ascii=False, separators=(',', ':'))
+
+
+def apply_diff(source, diff):
+    old = tokens(source)
+    position = 0
+    result = []
+    for op in json.loads(diff):
+        if isinstance(op, str):
+            result.append(op)
+        elif op >= 0:
+            result.extend(old[position:position + op])
+            position += op
+        else:
+            position -= op
+    return ''.join(result)
+
+
+def current_version(post):
+    last = post.revisions.values_list('number', flat=True).first()
+    return (last or 0) + 1
+
+
+def record_revision(post, previous_text):
+    """Сохраняет прежний текст поста обратным диффом к новому.
+
+    Вызывается в транзакции Post.save, где previous_text прочитан
+    под блокировкой строки. Если номер версии всё же занят, ошибка
+    целостности откатывает и саму правку: дифф от чужого текста
+    испортил бы историю.
+    """
+    PostRevision.objects.create(
+        post=post, number=current_version(post),
+        diff=make_diff(post.text, previous_text))
+
+
+def rebuild(post, version):
+    """Текст версии version: от актуального назад по обратным диффам."""
+    text = post.text
+    diffs = post.revisions.filter(number__gte=version).values_list(
+        'diff', flat=True)
+    for diff in diffs:
+        text = apply_diff(text, diff)
+    return text
@@ -0,0 +1,207 @@
+import re
+import sys
+from collections import Counter
+from functools import reduce
+from itertools import islice
+from operator import or_
+
+from django.db import connection
+from django.db.models import Case, IntegerField, Max, Q, Sum, When
+
+from .models import Post, SearchTerm
+
+FTS_TABLE = 'posts_post_fts'
+TOKEN_RE = re.compile(r'\w+')
+TERM_LENGTH: int = SearchTerm._meta.get_field('term').max_length
+REBUILD_CHUNK_SIZE: int = 1000
+
+
+def tokenize(text):
+    return [token.lower() for token in TOKEN_RE.findall(text or '')]
+
+
+class SQLiteFTSBackend:
+    """Поиск через виртуальную таблицу FTS5 с ранжированием bm25."""
+
+    def index(self, post_id, text, group_title):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post_id])
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, text, group_title) '
+                'VALUES (%s, %s, %s)', [post_id, text, group_title])
+
+    def remove(self, post_id):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post_id])
+
+    def match(self, terms):
+        # Каждое слово в кавычках: операторы FTS5 из запроса не работают.
+        return ' '.join(
+            '"{}"*'.format(term.replace('"', '')) for term in terms)
+
+    def filter(self, queryset, terms):
+        """Посты queryset, подходящие под запрос, одним подзапросом."""
+        # pk__in=RawSQL(...) даёт IN ((SELECT ...)), а такое SQLite
+        # читает как одно значение, поэтому условие пишется целиком.
+        table = queryset.model._meta.db_table
+        return queryset.extra(
+            where=[f'"{table}"."id" IN (SELECT rowid FROM {FTS_TABLE} '
+                   f'WHERE {FTS_TABLE} MATCH %s)'],
+            params=[self.match(terms)])
+
+    def count(self, terms):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT COUNT(*) FROM {FTS_TABLE} '
+                f'WHERE {FTS_TABLE} MATCH %s', [self.match(terms)])
+            return cursor.fetchone()[0]
+
+    def ids(self, terms, offset, limit):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+                f'ORDER BY bm25({FTS_TABLE}), rowid DESC LIMIT %s OFFSET %s',
+                [self.match(terms), limit, offset])
+            return [row[0] for row in cursor.fetchall()]
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, text, group_title) '
+                "SELECT p.id, p.text, COALESCE(g.title, '') "
+                'FROM posts_post p LEFT JOIN posts_group g '
+                'ON g.id = p.group_id')
+
+
+class InvertedIndexBackend:
+    """Инвертированный индекс в таблице SearchTerm, если FTS5 недоступен.
+
+    Строки (слово, пост, tf) обновляют сигналы поста и группы. Как и
+    в FTS5, слово запроса совпадает с началом слова поста: это
+    диапазон по индексу (term, post), так что поиск читает только
+    совпадения, а не всю таблицу постов. Выше посты, где слова запроса
+    встречаются чаще.
+    """
+
+    def terms(self, post_id, text, group_title):
+        frequencies = Counter(
+            token[:TERM_LENGTH]
+            for token in tokenize(text) + tokenize(group_title))
+        return [SearchTerm(term=term, post_id=post_id, tf=tf)
+                for term, tf in frequencies.items()]
+
+    def index(self, post_id, text, group_title):
+        SearchTerm.objects.filter(post_id=post_id).delete()
+        SearchTerm.objects.bulk_create(
+            self.terms(post_id, text, group_title))
+
+    def remove(self, post_id):
+        SearchTerm.objects.filter(post_id=post_id).delete()
+
+    def rebuild(self):
+        SearchTerm.objects.all().delete()
+        posts = Post.objects.order_by().values_list(
+            'pk', 'text', 'group__title').iterator()
+        # Порциями: память не растёт, вставка — один запрос на порцию.
+        for chunk in iter(lambda: list(islice(posts, REBUILD_CHUNK_SIZE)),
+                          []):
+            SearchTerm.objects.bulk_create(
+                term for post_id, text, group_title in chunk
+                for term in self.terms(post_id, text, group_title or ''))
+
+    def prefix(self, term):
+        term = term[:TERM_LENGTH]
+        return Q(term__gte=term, term__lt=term + chr(sys.maxunicode))
+
+    def matches(self, terms):
+        """post_id и score постов, где есть все слова запроса."""
+        conditions = [self.prefix(term) for term in dict.fromkeys(terms)]
+        found = {
+            f'has_{number}': Max(Case(
+                When(condition, then=1), default=0,
+                output_field=IntegerField()))
+            for number, condition in enumerate(conditions)
+        }
+        return (
+            SearchTerm.objects.filter(reduce(or_, conditions))
+            .values('post_id')
+            .annotate(score=Sum('tf'), **found)
+            .filter(**{name: 1 for name in found})
+        )
+
+    def filter(self, queryset, terms):
+        """Посты queryset, подходящие под запрос, одним подзапросом."""
+        return queryset.filter(
+            pk__in=self.matches(terms).values('post_id'))
+
+    def count(self, terms):
+        return self.matches(terms).count()
+
+    def ids(self, terms, offset, limit):
+        return list(
+            self.matches(terms).order_by('-score', '-post_id')
+            .values_list('post_id', flat=True)[offset:offset + limit]
+        )
+
+
+fts_ready = set()
+
+
+def fts_available():
+    if connection.vendor != 'sqlite':
+        return False
+    if connection.alias not in fts_ready:
+        if FTS_TABLE in connection.introspection.table_names():
+            fts_ready.add(connection.alias)
+    return connection.alias in fts_ready
+
+
+def get_backend():
+    if fts_available():
+        return SQLiteFTSBackend()
+    return InvertedIndexBackend()
+
+
+def index_post(post):
+    group_title = post.group.title if post.group_id else ''
+    get_backend().index(post.pk, post.text, group_title)
+
+
+def unindex_post(post_id):
+    get_backend().remove(post_id)
+
+
+def rebuild_index():
+    """Индексирует все посты заново, например после bulk_create."""
+    get_backend().rebuild()
+
+
+class SearchResults:
+    """Ленивая выдача поиска: Paginator берёт только нужный срез."""
+
+    def __init__(self, query):
+        self.terms = tokenize(query)
+        self.backend = get_backend()
+        self._count = None
+
+    def count(self):
+        if self._count is None:
+            self._count = self.backend.count(self.terms) if self.terms else 0
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, item):
+        if not isinstance(item, slice):
+            return self[item:item + 1][0]
+        if not self.terms:
+            return []
+        start = item.start or 0
+        stop = item.stop if item.stop is not None else self.count()
+        ids = self.backend.ids(self.terms, start, stop - start)
+        posts = Post.objects.for_feed().in_bulk(ids)
+        return [posts[post_id] for post_id in ids if post_id in posts]
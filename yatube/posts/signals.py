@@ -0,0 +1,179 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from sorl.thumbnail import delete as delete_thumbnails
+
+from . import counters
+from .cache import invalidate_index_pages, post_page_scopes, touch_pages
+from .revisions import record_revision
+from .models import Comment, Follow, Group, Post, User
+from .search import index_post, unindex_post
+from .timeline import (
+    backfill_if_demoted, backfill_timeline, drop_timeline, fan_out_post,
+)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def reset_index_cache(sender, **kwargs):
+    invalidate_index_pages()
+
+
+@receiver(pre_save, sender=Post)
+def remember_previous_post(sender, instance, raw=False, **kwargs):
+    if raw or instance.pk is None:
+        return
+    (instance._previous_group_id, instance._previous_image,
+     instance._previous_text) = (
+        Post.objects.select_for_update().filter(pk=instance.pk)
+        .values_list('group_id', 'image', 'text').first() or (None, '', None)
+    )
+    if instance._previous_image != instance.image.name:
+        # Миниатюры прежней картинки к новой не подходят.
+        instance.thumbnails_ready = False
+
+
+@receiver(post_save, sender=Post)
+def count_saved_post(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        counters.change_author_posts(instance.author_id, 1)
+        counters.change_group_posts(instance.group_id, 1)
+        return
+    previous_group_id = getattr(instance, '_previous_group_id', None)
+    if previous_group_id != instance.group_id:
+        counters.change_group_posts(previous_group_id, -1)
+        counters.change_group_posts(instance.group_id, 1)
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance, **kwargs):
+    counters.change_author_posts(instance.author_id, -1)
+    counters.change_group_posts(instance.group_id, -1)
+
+
+@receiver(post_save, sender=Comment)
+def count_saved_comment(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.change_post_comments(instance.post_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def count_deleted_comment(sender, instance, **kwargs):
+    counters.change_post_comments(instance.post_id, -1)
+
+
+@receiver(post_save, sender=Post)
+def remember_edited_text(sender, instance, created, raw=False, **kwargs):
+    previous_text = getattr(instance, '_previous_text', None)
+    if created or raw or previous_text is None:
+        return
+    if previous_text != instance.text:
+        record_revision(instance, previous_text)
+
+
+@receiver(post_save, sender=Post)
+def drop_replaced_thumbnails(sender, instance, created, raw=False, **kwargs):
+    previous_image = getattr(instance, '_previous_image', '')
+    if previous_image and previous_image != instance.image.name:
+        delete_thumbnails(previous_image, delete_file=False)
+
+
+@receiver(post_delete, sender=Post)
+def drop_deleted_thumbnails(sender, instance, **kwargs):
+    if instance.image:
+        delete_thumbnails(instance.image.name, delete_file=False)
+
+
+@receiver(post_save, sender=Post)
+def index_saved_post(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def unindex_deleted_post(sender, instance, **kwargs):
+    unindex_post(instance.pk)
+
+
+@receiver(post_save, sender=Group)
+def reindex_group_posts(sender, instance, created, raw=False, **kwargs):
+    if created or raw:
+        return
+    for post in instance.posts.select_related('group').only(
+            'text', 'group', 'group__title'):
+        index_post(post)
+
+
+@receiver(post_save, sender=Post)
+def fan_out_created_post(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        fan_out_post.delay(instance.pk)
+
+
+@receiver(post_save, sender=Follow)
+def start_following(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.change_author_followers(instance.author_id, 1)
+        backfill_timeline(instance.user, instance.author)
+
+
+@receiver(post_delete, sender=Follow)
+def stop_following(sender, instance, **kwargs):
+    counters.change_author_followers(instance.author_id, -1)
+    drop_timeline(instance.user_id, instance.author_id)
+    backfill_if_demoted(instance.author_id)
+
+
+@receiver(post_save, sender=Post)
+def touch_saved_post_pages(sender, instance, raw=False, **kwargs):
+    if not raw:
+        touch_pages(*post_page_scopes(instance))
+
+
+@receiver(post_delete, sender=Post)
+def touch_deleted_post_pages(sender, instance, **kwargs):
+    touch_pages(*post_page_scopes(instance))
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def touch_comment_pages(sender, instance, **kwargs):
+    touch_pages(f'post:{instance.post_id}')
+
+
+@receiver(pre_save, sender=Group)
+@receiver(pre_save, sender=User)
+def remember_previous_name(sender, instance, raw=False, update_fields=None,
+                           **kwargs):
+    if raw or instance.pk is None or update_fields:
+        return
+    field = 'slug' if sender is Group else 'username'
+    instance._previous_name = sender.objects.filter(
+        pk=instance.pk).values_list(field, flat=True).first()
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def touch_group_pages(sender, instance, **kwargs):
+    previous = getattr(instance, '_previous_name', None)
+    touch_pages(f'group:{instance.slug}', previous and f'group:{previous}')
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def touch_profile_pages(sender, instance, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) == {'last_login'}:
+        # Вход пользователя страниц не меняет.
+        return
+    previous = getattr(instance, '_previous_name', None)
+    touch_pages(
+        f'profile:{instance.username}', previous and f'profile:{previous}')
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def touch_followed_profile(sender, instance, **kwargs):
+    touch_pages(f'profile:{instance.author.username}')
@@ -0,0 +1,11 @@
+from django import template
+
+from ..cards import render_cards
+
+register = template.Library()
+
+
+@register.filter
+def post_cards(posts):
+    """Карточки постов страницы: {% for card in page_obj|post_cards %}."""
+    return render_cards(posts)
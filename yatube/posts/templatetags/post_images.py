@@ -0,0 +1,35 @@
+from django import template
+from django.db import transaction
+
+from ..thumbnails import generate_thumbnails, responsive_sources
+
+register = template.Library()
+
+
+@register.inclusion_tag('posts/includes/responsive_image.html')
+def responsive_image(image):
+    """<picture> с WebP и srcset из заранее созданных вариантов.
+
+    Пока варианты не готовы, отдаёт исходную картинку и ставит генерацию
+    в очередь задач, если её там ещё нет: миниатюры создаёт воркер,
+    а не процесс, отрисовывающий страницу.
+    """
+    if not image:
+        return {'image': None}
+    sources = responsive_sources(image)
+    if sources is None:
+        transaction.on_commit(
+            lambda: generate_thumbnails.delay_once(image.name))
+        return {'image': image}
+    fallback, _ = sources['JPEG'][-1]
+    return {
+        'image': image,
+        'fallback': fallback,
+        'webp_srcset': srcset(sources['WEBP']),
+        'jpeg_srcset': srcset(sources['JPEG']),
+    }
+
+
+def srcset(variants):
+    return ', '.join(
+        f'{thumbnail.url} {width}w' for thumbnail, width in variants)
@@ -0,0 +1,96 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import TestCase, TransactionTestCase
+
+from ..benchmark import (
+    build_scenarios, compare, compare_sqlite_profiles, render_timings, run,
+    seed_data,
+)
+from ..models import Comment, Group, Post, User
+
+SEED_POSTS: int = 60
+
+
+class BenchmarkTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed_data(posts=SEED_POSTS, users=5, groups=3, comments=40, seed=1)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_seed_data_is_spread_and_counted(self):
+        """Генератор создаёт данные с разными датами и счётчиками."""
+        self.assertEqual(Post.objects.count(), SEED_POSTS)
+        self.assertEqual(Comment.objects.count(), 40)
+        self.assertEqual(User.objects.count(), 5)
+        dates = Post.objects.values_list('pub_date', flat=True).distinct()
+        self.assertEqual(dates.count(), SEED_POSTS)
+        group = Group.objects.order_by('-post_count').first()
+        self.assertEqual(group.post_count, group.posts.count())
+
+    def test_scenarios_report_percentiles_and_queries(self):
+        """Каждый сценарий отдаёт перцентили и число запросов."""
+        results = run(build_scenarios(), iterations=2, warmup=1)
+        self.assertIn('add_comment', results)
+        self.assertGreater(results['post_detail']['queries'], 0)
+        self.assertEqual(results['index_anonymous']['queries'], 1)
+        self.assertEqual(Comment.objects.count(), 40)
+        for result in results.values():
+            self.assertLessEqual(result['p50'], result['p99'])
+
+    def test_compare_flags_slower_scenarios(self):
+        """Рост p95 выше порога и лишние запросы считаются регрессией."""
+        baseline = {'index': {'p95': 10.0, 'queries': 3}}
+        self.assertEqual(
+            compare({'index': {'p95': 11.0, 'queries': 3}}, baseline, 0.2),
+            [])
+        regressions = compare(
+            {'index': {'p95': 13.0, 'queries': 4}}, baseline, 0.2)
+        self.assertEqual(len(regressions), 2)
+
+    def test_render_timings_per_template(self):
+        """С cached.Loader после прогрева шаблоны не компилируются."""
+        results = render_timings(build_scenarios(), iterations=1)
+        card = results['posts/includes/post_card.html']
+        self.assertGreater(card['renders'], 0)
+        self.assertEqual(card['cached_compiles'], 0)
+        self.assertGreater(card['uncached_compiles'], 0)
+        self.assertIn('cached_ms', results['base.html'])
+
+    def test_command_fails_against_faster_baseline(self):
+        """Команда падает, если текущий замер хуже базового."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'baseline.json')
+            # Прогрев создаёт отметки изменения страниц: без него
+            # первый замер сделал бы на пару запросов больше.
+            call_command('benchmark', '--iterations=1', '--warmup=1',
+                         '--scenario=index', '--save-baseline',
+                         f'--baseline={path}', stdout=StringIO())
+            with open(path) as file:
+                baseline = json.load(file)
+            baseline['index']['queries'] -= 1
+            with open(path, 'w') as file:
+                json.dump(baseline, file)
+            with self.assertRaises(CommandError):
+                call_command('benchmark', '--iterations=1', '--warmup=1',
+                             '--scenario=index', f'--baseline={path}',
+                             stdout=StringIO())
+
+
+class ContentionTests(TransactionTestCase):
+    # Копия БД снимается через backup: транзакция TestCase его заблокирует.
+    def test_production_profile_avoids_lock_errors(self):
+        """Под конкурентной записью профиль production не ловит блокировки."""
+        seed_data(posts=20, users=3, groups=1, comments=10, seed=2)
+        results = compare_sqlite_profiles(writers=3, readers=2, operations=5)
+        self.assertEqual(set(results), {'stock', 'production'})
+        production = results['production']
+        self.assertEqual(production['write_locked'], 0)
+        self.assertGreater(production['writes_per_second'], 0)
+        self.assertEqual(Comment.objects.count(), 10)
@@ -0,0 +1,64 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core.templates import template_timings
+
+from ..cards import CARD_TEMPLATE, card_key, render_cards
+from ..models import Group, Post, User
+
+
+class PostCardCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Первая версия')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.author)
+
+    def card_renders(self, *urls):
+        with template_timings() as stats:
+            for url in urls:
+                self.client.get(url)
+        return stats[CARD_TEMPLATE]['renders']
+
+    def test_card_rendered_once_for_all_feeds(self):
+        """Карточка поста отрисовывается один раз на все ленты."""
+        renders = self.card_renders(
+            reverse('posts:index'),
+            reverse('posts:group_list', args=(self.group.slug,)),
+            reverse('posts:profile', args=(self.author.username,)),
+        )
+        self.assertEqual(renders, 1)
+
+    def test_edit_renders_card_again(self):
+        """После правки поста в лентах новая версия карточки."""
+        url = reverse('posts:index')
+        self.client.get(url)
+        self.client.post(
+            reverse('posts:post_edit', args=(self.post.pk,)),
+            {'text': 'Вторая версия', 'group': self.group.pk})
+        response = self.client.get(url)
+        self.assertContains(response, 'Вторая версия')
+        self.assertNotContains(response, 'Первая версия')
+
+    def test_author_rename_changes_key(self):
+        """Новое имя автора даёт новый ключ карточки."""
+        post = Post.objects.for_feed().get(pk=self.post.pk)
+        key = card_key(post)
+        post.author.first_name = 'Лев'
+        self.assertNotEqual(card_key(post), key)
+
+    def test_card_without_thumbnails_not_cached(self):
+        """Карточку с неготовыми миниатюрами не кэшируем."""
+        Post.objects.filter(pk=self.post.pk).update(image='posts/cat.jpg')
+        post = Post.objects.for_feed().get(pk=self.post.pk)
+        [card] = render_cards([post])
+        self.assertIn('posts/cat.jpg', card)
+        self.assertIsNone(cache.get(card_key(post)))
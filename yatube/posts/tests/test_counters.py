@@ -0,0 +1,86 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import AuthorStats, Comment, Group, Post, User
+
+
+class CountersTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='NoName')
+        cls.group = Group.objects.create(
+            title='test-text',
+            slug='test-slug',
+            description='test_description',
+        )
+        cls.new_group = Group.objects.create(
+            title='new-group',
+            slug='new-group-slug',
+            description='test_description',
+        )
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def assertCounters(self, author_posts, group_posts, new_group_posts):
+        self.user.refresh_from_db()
+        self.group.refresh_from_db()
+        self.new_group.refresh_from_db()
+        self.assertEqual(self.user.post_stats.post_count, author_posts)
+        self.assertEqual(self.group.post_count, group_posts)
+        self.assertEqual(self.new_group.post_count, new_group_posts)
+
+    def test_counters_follow_post_create_edit_delete(self):
+        """Счётчики постов следуют за созданием, сменой группы и удалением."""
+        self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={'text': 'test-post-text', 'group': self.group.pk},
+        )
+        post = Post.objects.get()
+        self.assertCounters(1, 1, 0)
+        self.authorized_client.post(
+            reverse('posts:post_edit', args=(post.id,)),
+            data={'text': 'test-post-text', 'group': self.new_group.pk},
+        )
+        self.assertCounters(1, 0, 1)
+        Post.objects.get(pk=post.pk).delete()
+        self.assertCounters(0, 0, 0)
+
+    def test_comment_counter(self):
+        """Счётчик комментариев растёт и уменьшается вместе с ними."""
+        post = Post.objects.create(author=self.user, text='test-post-text')
+        self.authorized_client.post(
+            reverse('posts:add_comment', args=(post.id,)),
+            data={'text': 'comment-text'},
+        )
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 1)
+        Comment.objects.get().delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 0)
+
+    def test_recount_counters_command(self):
+        """Команда recount_counters чинит разошедшиеся счётчики."""
+        post = Post.objects.create(
+            author=self.user, text='test-post-text', group=self.group)
+        Comment.objects.create(post=post, author=self.user, text='comment')
+        AuthorStats.objects.all().delete()
+        Group.objects.update(post_count=7)
+        Post.objects.update(comment_count=0)
+        call_command('recount_counters', stdout=StringIO())
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 1)
+        self.assertCounters(1, 1, 0)
+
+    def test_profile_reads_stored_counter(self):
+        """Профиль берёт число постов из счётчика, а не из COUNT(*)."""
+        Post.objects.create(author=self.user, text='test-post-text')
+        AuthorStats.objects.filter(author=self.user).update(post_count=42)
+        response = self.authorized_client.get(
+            reverse('posts:profile', kwargs={'username': 'NoName'}))
+        self.assertEqual(response.context['post_count'], 42)
@@ -0,0 +1,156 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.models import Job
+from core.tasks import run_job
+
+from ..models import Follow, Post, TimelineEntry, User
+from ..timeline import follow_page
+from ..utils import LAST_10_POSTS
+
+
+class FollowTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='NoName')
+        cls.author = User.objects.create_user(username='author')
+        cls.star = User.objects.create_user(username='star')
+        cls.idol = User.objects.create_user(username='idol')
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def follow(self, author):
+        self.authorized_client.post(
+            reverse('posts:profile_follow', args=(author.username,)))
+
+    def feed_ids(self):
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        return [post.pk for post in response.context['page_obj']]
+
+    def test_follow_and_unfollow(self):
+        """Подписка наполняет ленту, отписка её очищает."""
+        old_post = Post.objects.create(author=self.author, text='old')
+        self.follow(self.author)
+        self.follow(self.user)
+        self.assertEqual(Follow.objects.count(), 1)
+        new_post = Post.objects.create(author=self.author, text='new')
+        self.assertEqual(self.feed_ids(), [new_post.pk, old_post.pk])
+        self.assertEqual(self.author.post_stats.follower_count, 1)
+        self.authorized_client.post(
+            reverse('posts:profile_unfollow', args=(self.author.username,)))
+        self.assertEqual(self.feed_ids(), [])
+        self.assertFalse(TimelineEntry.objects.exists())
+
+    @override_settings(TASKS_SYNC=False)
+    def test_follow_between_enqueue_and_run(self):
+        """Подписка до запуска раскладки не ломает задачу."""
+        reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=reader, author=self.author)
+        post = Post.objects.create(author=self.author, text='new')
+        job = Job.objects.get(name='posts.timeline.fan_out_post')
+        self.follow(self.author)
+        self.assertEqual(run_job(job.pk), Job.DONE)
+        self.assertEqual(
+            set(TimelineEntry.objects.filter(post=post).values_list(
+                'user_id', flat=True)),
+            {reader.pk, self.user.pk})
+
+    def test_post_not_in_feed_of_non_followers(self):
+        """Пост не попадает в ленту тех, кто не подписан на автора."""
+        Post.objects.create(author=self.author, text='new')
+        self.assertEqual(self.feed_ids(), [])
+
+    @override_settings(FOLLOW_FANOUT_LIMIT=0)
+    def test_popular_author_read_on_merge(self):
+        """Посты популярного автора читаются при показе ленты."""
+        self.follow(self.star)
+        post = Post.objects.create(author=self.star, text='star-post')
+        self.assertFalse(TimelineEntry.objects.filter(post=post).exists())
+        self.assertEqual(self.feed_ids(), [post.pk])
+
+    def test_merged_feed_pages(self):
+        """Лента из двух источников листается вперёд и назад без повторов."""
+        self.follow(self.author)
+        self.follow(self.star)
+        for i in range(LAST_10_POSTS + 5):
+            Post.objects.create(author=self.author, text=f'author-{i}')
+            Post.objects.create(author=self.star, text=f'star-{i}')
+        expected = list(
+            Post.objects.order_by('-pub_date', '-pk').values_list(
+                'pk', flat=True))
+        with override_settings(FOLLOW_FANOUT_LIMIT=0):
+            self.star.post_stats.refresh_from_db()
+            TimelineEntry.objects.filter(author=self.star).delete()
+            pages = [follow_page(self.user)]
+            while pages[-1].has_next():
+                pages.append(
+                    follow_page(self.user, after=pages[-1].next_cursor))
+            back = follow_page(self.user, before=pages[1].previous_cursor)
+        self.assertEqual(
+            [post.pk for page in pages for post in page], expected)
+        self.assertEqual([post.pk for post in back],
+                         [post.pk for post in pages[0]])
+        self.assertFalse(back.has_previous())
+
+    def test_follow_feed_query_budget(self):
+        """Лента подписок читается фиксированным числом запросов."""
+        self.follow(self.author)
+        for i in range(LAST_10_POSTS * 3):
+            Post.objects.create(author=self.author, text=f'author-{i}')
+        with self.assertNumQueries(2):
+            page = follow_page(self.user)
+            [post.author.username for post in page]
+
+    def test_follow_requires_post(self):
+        """Подписка и отписка не выполняются по GET."""
+        for name in ('posts:profile_follow', 'posts:profile_unfollow'):
+            with self.subTest(name=name):
+                response = self.authorized_client.get(
+                    reverse(name, args=(self.author.username,)))
+                self.assertEqual(response.status_code, 405)
+        self.assertFalse(Follow.objects.exists())
+
+    @override_settings(FOLLOW_FANOUT_LIMIT=0)
+    def test_several_popular_authors_merged(self):
+        """Посты нескольких популярных авторов сливаются по дате."""
+        for author in (self.author, self.star, self.idol):
+            self.follow(author)
+        for i in range(LAST_10_POSTS):
+            for author in (self.star, self.idol, self.author):
+                Post.objects.create(author=author, text=f'{author}-{i}')
+        self.assertFalse(TimelineEntry.objects.exists())
+        expected = list(Post.objects.order_by('-pub_date', '-pk')
+                        .values_list('pk', flat=True))
+        first = follow_page(self.user)
+        second = follow_page(self.user, after=first.next_cursor)
+        self.assertEqual(
+            [post.pk for post in first] + [post.pk for post in second],
+            expected[:LAST_10_POSTS * 2])
+        with CaptureQueriesContext(connection) as queries:
+            follow_page(self.user)
+        for query in queries:
+            with self.subTest(sql=query['sql']):
+                with connection.cursor() as cursor:
+                    cursor.execute('EXPLAIN QUERY PLAN ' + query['sql'])
+                    plan = str(cursor.fetchall())
+                self.assertNotIn('TEMP B-TREE', plan)
+
+    @override_settings(FOLLOW_FANOUT_LIMIT=1)
+    def test_author_below_limit_backfilled(self):
+        """Автор, опустившийся до порога, попадает в ленты подписчиков."""
+        reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=reader, author=self.star)
+        self.follow(self.star)
+        post = Post.objects.create(author=self.star, text='star-post')
+        self.assertFalse(TimelineEntry.objects.filter(post=post).exists())
+        Follow.objects.get(user=reader).delete()
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.user, post=post).exists())
+        self.assertEqual(self.feed_ids(), [post.pk])
@@ -0,0 +1,126 @@
+import csv
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from core.models import Job
+
+from ..bulk import explicit_dates
+from ..models import Comment, Follow, Group, Post, TimelineEntry, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+RECORDS = [
+    {'kind': 'user', 'username': 'leo', 'first_name': 'Лев'},
+    {'kind': 'group', 'slug': 'cats', 'title': 'Коты',
+     'description': 'Про котов'},
+    {'kind': 'post', 'id': 500, 'text': 'Старый пост', 'author': 'leo',
+     'group': 'cats', 'pub_date': '2020-01-02T03:04:05+00:00',
+     'image': 'posts/cat.gif'},
+    {'kind': 'post', 'text': 'Без группы', 'author': 'leo'},
+    {'kind': 'comment', 'id': 900, 'post': 500, 'author': 'leo',
+     'text': 'Мяу'},
+    {'kind': 'post', 'text': 'Чужой', 'author': 'nobody'},
+]
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ImportPostsTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        os.makedirs(os.path.join(self.directory, 'images', 'posts'))
+        with open(os.path.join(
+                self.directory, 'images', 'posts', 'cat.gif'), 'wb') as file:
+            file.write(b'GIF89a')
+        self.out = StringIO()
+        self.path = os.path.join(self.directory, 'dump.jsonl')
+        with open(self.path, 'w') as file:
+            for record in RECORDS:
+                file.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+    def import_posts(self, *args):
+        err = StringIO()
+        call_command('import_posts', *args, '--chunk-size=2',
+                     stdout=self.out, stderr=err)
+        return err.getvalue()
+
+    def test_jsonl_import_resolves_references(self):
+        """Импорт JSONL связывает посты с авторами, группами и картинками."""
+        errors = self.import_posts(
+            self.path, f'--images={self.directory}/images')
+        post = Post.objects.get(pk=500)
+        self.assertEqual(post.author.username, 'leo')
+        self.assertEqual(post.group.slug, 'cats')
+        self.assertEqual(post.pub_date.year, 2020)
+        self.assertEqual(post.comment_count, 1)
+        self.assertEqual(Group.objects.get().post_count, 1)
+        self.assertTrue(os.path.exists(post.image.path))
+        self.assertEqual(Post.objects.count(), 2)
+        self.assertIn('nobody', errors)
+
+    def test_reimport_does_not_duplicate(self):
+        """Повторный импорт не дублирует пользователей, группы и посты."""
+        self.import_posts(self.path)
+        self.import_posts(self.path)
+        self.assertEqual(User.objects.count(), 1)
+        self.assertEqual(Group.objects.count(), 1)
+        self.assertEqual(Post.objects.filter(pk=500).count(), 1)
+        self.assertEqual(Comment.objects.count(), 1)
+
+    def test_reimport_counts_only_new_records(self):
+        """В итоге повторного импорта нет уже загруженных записей."""
+        self.import_posts(self.path)
+        self.out = StringIO()
+        self.import_posts(self.path)
+        self.assertIn('user: 0, group: 0, post: 1, comment: 0',
+                      self.out.getvalue())
+
+    def test_import_fills_follow_timelines(self):
+        """Импортированные посты попадают в ленты подписчиков автора."""
+        leo = User.objects.create_user(username='leo')
+        reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=reader, author=leo)
+        self.import_posts(self.path)
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=reader).count(), 2)
+
+    @override_settings(TASKS_SYNC=False)
+    def test_import_queues_thumbnails(self):
+        """Для картинок импортированных постов ставится генерация."""
+        self.import_posts(self.path, f'--images={self.directory}/images')
+        job = Job.objects.get(name='posts.thumbnails.generate_thumbnails')
+        self.assertIn('posts/cat.gif', job.payload)
+
+    def test_explicit_dates_nested(self):
+        """Вложенный explicit_dates не теряет флаги auto_now."""
+        field = Post._meta.get_field('updated_at')
+        with explicit_dates(Post):
+            with explicit_dates(Post, Comment):
+                self.assertFalse(field.auto_now)
+            self.assertFalse(field.auto_now)
+        self.assertTrue(field.auto_now)
+
+    def test_csv_kind_from_file_name(self):
+        """Тип записей CSV берётся из имени файла."""
+        User.objects.create_user(username='leo')
+        path = os.path.join(self.directory, 'comments.csv')
+        Post.objects.create(pk=7, text='Пост', author=User.objects.get())
+        with open(path, 'w', newline='') as file:
+            writer = csv.DictWriter(file, ['post', 'author', 'text'])
+            writer.writeheader()
+            writer.writerow({'post': 7, 'author': 'leo', 'text': 'Первый'})
+            writer.writerow({'post': 8, 'author': 'leo', 'text': 'Мимо'})
+        self.import_posts(path)
+        self.assertEqual(
+            list(Comment.objects.values_list('text', flat=True)), ['Первый'])
@@ -1,6 +1,11 @@
+from unittest import skipUnless
+
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
-from ..models import Group, Post, User
+from ..models import Comment, Group, Post, User
+from ..utils import comments_page, encode_cursor
 
 
 class PostModelTest(TestCase):
@@ -48,3 +53,56 @@ class PostModelTest(TestCase):
             with self.subTest(field=field):
                 self.assertEqual(
                     post._meta.get_field(field).help_text, expected_value)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'План запроса SQLite')
+class FeedIndexTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Тестовый пост',
+            group=cls.group,
+        )
+        Comment.objects.create(
+            post=cls.post,
+            author=cls.user,
+            text='Тестовый комментарий',
+        )
+
+    def test_feed_queries_use_indexes(self):
+        """Запросы лент идут по составным индексам без сортировки."""
+        queries = {
+            'post_pub_date_idx': Post.objects.for_feed()[:10],
+            'post_group_pub_date_idx': self.group.posts.for_feed()[:10],
+            'post_author_pub_date_idx': self.user.posts.for_feed()[:10],
+        }
+        for index, queryset in queries.items():
+            with self.subTest(index=index):
+                plan = queryset.explain()
+                self.assertIn(f'USING INDEX {index}', plan)
+                self.assertNotIn('TEMP B-TREE', plan)
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+            return str(cursor.fetchall())
+
+    def test_comments_page_uses_index(self):
+        """Порции комментариев читаются по индексу без сортировки."""
+        comment = self.post.comments.get()
+        for after in (None, encode_cursor(comment)):
+            with self.subTest(after=after):
+                with CaptureQueriesContext(connection) as queries:
+                    comments_page(self.post.pk, after=after)
+                [query] = queries
+                plan = self.explain(query['sql'])
+                self.assertIn('USING INDEX comment_post_pub_date_idx', plan)
+                self.assertNotIn('TEMP B-TREE', plan)
@@ -0,0 +1,90 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Post, User
+from ..utils import LAST_10_POSTS, PAGE_WINDOW, CursorPaginator
+
+TOTAL_POSTS: int = 25
+
+
+class CursorPaginatorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='NoName')
+        Post.objects.bulk_create(
+            Post(author=cls.user, text=f'post-{i}')
+            for i in range(TOTAL_POSTS)
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def walk_forward(self):
+        paginator = CursorPaginator(Post.objects.all(), LAST_10_POSTS)
+        page = paginator.get_page()
+        pages = [page]
+        while page.has_next():
+            page = paginator.get_page(after=page.next_cursor)
+            pages.append(page)
+        return pages
+
+    def test_cursor_pages_cover_all_posts_once(self):
+        """Курсорные страницы выдают все посты ровно один раз по порядку."""
+        pages = self.walk_forward()
+        ids = [post.pk for page in pages for post in page]
+        expected = list(
+            Post.objects.order_by('-pub_date', '-pk').values_list(
+                'pk', flat=True))
+        self.assertEqual(ids, expected)
+        self.assertEqual(len(pages), 3)
+        self.assertFalse(pages[0].has_previous())
+        self.assertFalse(pages[-1].has_next())
+
+    def test_cursor_previous_page(self):
+        """Ссылка назад возвращает предыдущую страницу."""
+        first, second, _ = self.walk_forward()
+        paginator = CursorPaginator(Post.objects.all(), LAST_10_POSTS)
+        back = paginator.get_page(before=second.previous_cursor)
+        self.assertEqual([p.pk for p in back], [p.pk for p in first])
+        self.assertFalse(back.has_previous())
+        self.assertTrue(back.has_next())
+
+    def test_cursor_page_skips_count(self):
+        """Курсорная страница строится одним запросом без COUNT(*)."""
+        _, second, _ = self.walk_forward()
+        paginator = CursorPaginator(Post.objects.all(), LAST_10_POSTS)
+        with CaptureQueriesContext(connection) as queries:
+            page = paginator.get_page(after=second.next_cursor)
+            len(page)
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('COUNT(', queries[0]['sql'].upper())
+        self.assertNotIn('OFFSET', queries[0]['sql'].upper())
+
+    def test_broken_cursor_falls_back_to_first_page(self):
+        """Испорченный курсор открывает первую страницу."""
+        response = self.guest_client.get(
+            reverse('posts:index') + '?after=garbage')
+        self.assertEqual(len(response.context['page_obj']), LAST_10_POSTS)
+        self.assertFalse(response.context['page_obj'].has_previous())
+
+    @override_settings(POSTS_CURSOR_PAGINATION=True)
+    def test_feed_renders_cursor_links(self):
+        """В курсорном режиме лента отдаёт ссылку на следующую страницу."""
+        response = self.guest_client.get(reverse('posts:index'))
+        page_obj = response.context['page_obj']
+        self.assertContains(response, f'?after={page_obj.next_cursor}')
+        self.assertNotContains(response, '?page=')
+
+    def test_numbered_links_are_windowed(self):
+        """Номера страниц выводятся окном вокруг текущей, а не все подряд."""
+        Post.objects.bulk_create(
+            Post(author=self.user, text=f'more-{i}') for i in range(100))
+        response = self.guest_client.get(reverse('posts:index') + '?page=7')
+        window = list(response.context['page_obj'].page_window)
+        self.assertEqual(window, list(range(7 - PAGE_WINDOW, 8 + PAGE_WINDOW)))
+        self.assertNotContains(response, '>1</a>')
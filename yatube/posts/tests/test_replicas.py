@@ -0,0 +1,94 @@
+import shutil
+import sqlite3
+import tempfile
+
+from django.core.cache import cache
+from django.db import connections
+from django.test import Client, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.db import PRIMARY_COOKIE
+
+from ..models import Post, User
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRoutingTests(TransactionTestCase):
+    databases = {'default', 'replica'}
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.mkdtemp()
+        cls.replica_path = f'{cls.directory}/replica.sqlite3'
+        connections.databases['replica'] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': cls.replica_path,
+            'TEST': {'NAME': cls.replica_path},
+        }
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections['replica'].close()
+        del connections.databases['replica']
+        shutil.rmtree(cls.directory, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        Post.objects.create(author=self.author, text='Первый пост')
+        self.replicate()
+        # Запись, до которой реплика ещё не доехала.
+        Post.objects.create(author=self.author, text='Второй пост')
+        self.url = reverse('posts:profile', args=(self.author.username,))
+
+    def replicate(self):
+        """Копирует основную БД в файл реплики, как это сделал бы поток
+        репликации."""
+        connections['replica'].close()
+        primary = connections['default']
+        primary.ensure_connection()
+        target = sqlite3.connect(self.replica_path)
+        try:
+            primary.connection.backup(target)
+        finally:
+            target.close()
+
+    @override_settings(READ_YOUR_WRITES_SECONDS=0)
+    def test_read_views_use_replica(self):
+        """Страницы чтения собираются с реплики, даже если она отстаёт."""
+        with CaptureQueriesContext(connections['replica']) as queries:
+            response = Client().get(self.url)
+        self.assertEqual(len(response.context['page_obj']), 1)
+        self.assertTrue(queries)
+        self.assertNotIn(PRIMARY_COOKIE, response.cookies)
+
+    @override_settings(READ_YOUR_WRITES_SECONDS=60)
+    def test_writer_reads_own_writes(self):
+        """После записи клиент читает с основной БД."""
+        client = Client()
+        client.force_login(self.author)
+        response = client.post(
+            reverse('posts:post_create'), {'text': 'Третий пост'})
+        self.assertIn(PRIMARY_COOKIE, response.cookies)
+        with CaptureQueriesContext(connections['replica']) as queries:
+            response = client.get(self.url)
+        self.assertEqual(len(response.context['page_obj']), 3)
+        self.assertFalse(queries)
+
+    @override_settings(READ_YOUR_WRITES_SECONDS=60)
+    def test_fresh_pages_come_from_primary(self):
+        """Недавно изменённые страницы не строятся по отстающей реплике."""
+        response = Client().get(self.url)
+        self.assertEqual(len(response.context['page_obj']), 2)
+
+    def test_other_views_and_writes_use_primary(self):
+        """Вне страниц чтения реплика не используется."""
+        client = Client()
+        client.force_login(self.author)
+        with CaptureQueriesContext(connections['replica']) as queries:
+            client.get(reverse('posts:follow_index'))
+            client.get(reverse('posts:post_create'))
+        self.assertFalse(queries)
@@ -0,0 +1,104 @@
+from unittest import mock
+
+from django.db import IntegrityError
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Group, Post, PostRevision, User
+from ..revisions import apply_diff, make_diff, rebuild
+
+LONG_TEXT = 'Длинный текст поста, в котором меняется одно слово. ' * 50
+
+
+class RevisionDiffTests(TestCase):
+    def test_diff_rebuilds_target(self):
+        """Дифф превращает исходный текст в целевой."""
+        pairs = [
+            ('', 'Новый текст'),
+            ('Старый текст', ''),
+            ('Мама мыла раму.', 'Мама мыла окно, а папа раму!'),
+            ('строка 1\nстрока 2\n', 'строка 0\nстрока 2\nстрока 3'),
+        ]
+        for source, target in pairs:
+            with self.subTest(source=source, target=target):
+                self.assertEqual(
+                    apply_diff(source, make_diff(source, target)), target)
+
+    def test_diff_size_follows_edit_size(self):
+        """Размер диффа растёт с правкой, а не с длиной текста."""
+        edited = LONG_TEXT.replace('одно', 'другое', 1)
+        self.assertLess(len(make_diff(edited, LONG_TEXT)), 40)
+
+
+class PostHistoryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+
+    def setUp(self):
+        self.post = Post.objects.create(author=self.author, text='Версия 1')
+        self.client = Client()
+        self.client.force_login(self.author)
+
+    def edit(self, text):
+        self.client.post(
+            reverse('posts:post_edit', args=(self.post.id,)), {'text': text})
+        self.post.refresh_from_db()
+
+    def test_edits_are_stored_as_revisions(self):
+        """Каждая правка текста сохраняет прежнюю версию."""
+        created_at = self.post.updated_at
+        self.edit('Версия 2')
+        self.edit('Версия 3')
+        self.assertGreater(self.post.updated_at, created_at)
+        self.assertEqual(PostRevision.objects.count(), 2)
+        self.assertEqual(rebuild(self.post, 1), 'Версия 1')
+        self.assertEqual(rebuild(self.post, 2), 'Версия 2')
+        self.assertEqual(rebuild(self.post, 3), 'Версия 3')
+
+    def test_stale_edit_builds_on_saved_text(self):
+        """Правка по устаревшей копии поста берёт текст из БД."""
+        stale = Post.objects.get(pk=self.post.pk)
+        self.edit('Версия 2')
+        stale.text = 'Версия 3'
+        stale.save()
+        self.post.refresh_from_db()
+        self.assertEqual(rebuild(self.post, 2), 'Версия 2')
+        self.assertEqual(rebuild(self.post, 1), 'Версия 1')
+
+    def test_version_conflict_rolls_back_edit(self):
+        """Занятый номер версии не глушится и откатывает правку."""
+        PostRevision.objects.create(post=self.post, number=1, diff='[]')
+        self.post.text = 'Версия 2'
+        with mock.patch('posts.revisions.current_version', return_value=1):
+            with self.assertRaises(IntegrityError):
+                self.post.save()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.text, 'Версия 1')
+
+    def test_group_change_keeps_text_history(self):
+        """Смена группы без правки текста новую версию не создаёт."""
+        self.post.group = self.group
+        self.post.save()
+        self.assertFalse(self.post.revisions.exists())
+
+    def test_history_view_rebuilds_revision(self):
+        """Страница истории показывает запрошенную версию."""
+        self.edit('Версия 2')
+        response = self.client.get(
+            reverse('posts:post_revision', args=(self.post.id, 1)))
+        self.assertEqual(response.context['text'], 'Версия 1')
+        response = self.client.get(
+            reverse('posts:post_revision', args=(self.post.id, 3)))
+        self.assertEqual(response.status_code, 404)
+
+    def test_history_is_hidden_from_other_users(self):
+        """Чужую историю правок видит только автор."""
+        other = Client()
+        other.force_login(User.objects.create_user(username='other'))
+        url = reverse('posts:post_history', args=(self.post.id,))
+        self.assertRedirects(
+            other.get(url),
+            reverse('posts:post_detail', args=(self.post.id,)))
@@ -0,0 +1,149 @@
+from unittest import mock
+
+from django.contrib.admin.sites import site
+from django.db import connection
+from django.test import Client, RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Group, Post, SearchTerm, User
+from ..search import (InvertedIndexBackend, SQLiteFTSBackend, get_backend,
+                      rebuild_index, tokenize)
+from ..utils import LAST_10_POSTS
+
+
+class SearchTests(TestCase):
+    backend_class = SQLiteFTSBackend
+    # По чему в SQL видно, что поиск идёт через индекс.
+    index_marker = 'MATCH'
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='NoName')
+        cls.group = Group.objects.create(
+            title='Котики',
+            slug='cats',
+            description='test_description',
+        )
+        cls.rare = Post.objects.create(
+            author=cls.user, text='Собака лает, а кошка спит')
+        cls.frequent = Post.objects.create(
+            author=cls.user, text='Кошка, кошка и ещё раз кошка')
+        cls.in_group = Post.objects.create(
+            author=cls.user, text='Просто пост', group=cls.group)
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def test_backend_selected(self):
+        """Поиск идёт через ожидаемый движок."""
+        self.assertIsInstance(get_backend(), self.backend_class)
+
+    def test_ranks_results(self):
+        """Выше пост, где слово запроса встречается чаще."""
+        for query in ('кошка', 'кош'):
+            with self.subTest(query=query):
+                self.assertEqual(
+                    get_backend().ids(tokenize(query), 0, 10),
+                    [self.frequent.pk, self.rare.pk])
+
+    def test_matches_words_and_prefixes(self):
+        """Находятся посты со всеми словами запроса, в том числе по
+        началу слова и по названию группы."""
+        queries = {
+            'кошка': {self.frequent.pk, self.rare.pk},
+            'кош': {self.frequent.pk, self.rare.pk},
+            'котики': {self.in_group.pk},
+            'кошка собака': {self.rare.pk},
+            'кош кошка': {self.frequent.pk, self.rare.pk},
+            'ошка': set(),
+        }
+        backend = get_backend()
+        for query, expected in queries.items():
+            with self.subTest(query=query):
+                terms = tokenize(query)
+                self.assertEqual(backend.count(terms), len(expected))
+                self.assertEqual(set(backend.ids(terms, 0, 10)), expected)
+
+    def test_index_follows_edit_and_delete(self):
+        """Выдача меняется при изменении и удалении поста и группы."""
+        rare = Post.objects.get(pk=self.rare.pk)
+        rare.text = 'Собака лает'
+        rare.save()
+        backend = get_backend()
+        self.assertEqual(
+            backend.ids(tokenize('кошка'), 0, 10), [self.frequent.pk])
+        Post.objects.get(pk=self.frequent.pk).delete()
+        self.assertEqual(backend.count(tokenize('кошка')), 0)
+        group = Group.objects.get(pk=self.group.pk)
+        group.title = 'Собачки'
+        group.save()
+        self.assertEqual(
+            backend.ids(tokenize('собачки'), 0, 10), [self.in_group.pk])
+
+    def test_rebuild_restores_index(self):
+        """Пересборка находит посты, записанные в обход сигналов."""
+        Post.objects.bulk_create([Post(author=self.user, text='Попугай')])
+        rebuild_index()
+        self.assertEqual(get_backend().count(tokenize('попугай')), 1)
+        self.assertEqual(get_backend().count(tokenize('кошка')), 2)
+
+    def test_admin_search_filters_in_database(self):
+        """Поиск в админке фильтрует подзапросом, не списком id."""
+        admin = site._registry[Post]
+        request = RequestFactory().get('/admin/posts/post/')
+        queryset, _ = admin.get_search_results(
+            request, Post.objects.all(), 'кошка')
+        self.assertNotIn(str(self.frequent.pk) + ', ', str(queryset.query))
+        self.assertIn(self.index_marker, str(queryset.query))
+        self.assertEqual(set(queryset), {self.frequent, self.rare})
+
+    def test_search_view_paginates(self):
+        """Страница поиска делит выдачу на страницы и помнит запрос."""
+        Post.objects.bulk_create(
+            Post(author=self.user, text=f'кошка номер {i}')
+            for i in range(LAST_10_POSTS)
+        )
+        for post in Post.objects.filter(text__startswith='кошка номер'):
+            post.save()
+        response = self.guest_client.get(
+            reverse('posts:search'), {'q': 'Кошка'})
+        page_obj = response.context['page_obj']
+        self.assertEqual(page_obj.paginator.count, LAST_10_POSTS + 2)
+        self.assertEqual(len(page_obj), LAST_10_POSTS)
+        self.assertContains(
+            response, '?q=%D0%9A%D0%BE%D1%88%D0%BA%D0%B0&amp;page=2')
+        response = self.guest_client.get(reverse('posts:search'))
+        self.assertEqual(len(response.context['page_obj']), 0)
+
+
+class InvertedIndexSearchTests(SearchTests):
+    """Те же проверки для БД без FTS5."""
+    backend_class = InvertedIndexBackend
+    index_marker = SearchTerm._meta.db_table
+
+    @classmethod
+    def setUpClass(cls):
+        cls.without_fts = mock.patch('posts.search.fts_available',
+                                     return_value=False)
+        cls.without_fts.start()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.without_fts.stop()
+
+    def test_search_reads_index_range(self):
+        """Слово запроса ищется диапазоном по индексу слов, без обхода
+        таблицы постов."""
+        backend = get_backend()
+        with CaptureQueriesContext(connection) as queries:
+            backend.ids(tokenize('кош собака'), 0, 10)
+        [query] = queries.captured_queries
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + query['sql'])
+            plan = ' '.join(str(row[-1]) for row in cursor.fetchall())
+        self.assertIn('(term>? AND term<?)', plan)
+        self.assertNotIn('SCAN', plan)
@@ -0,0 +1,184 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.template import Context, Template
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.images import ImageFile
+
+from core.models import Job
+from core.tasks import run_job
+
+from ..kvstore import KVStore
+from ..models import Post, User
+from ..thumbnails import generate_thumbnails
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='NoName')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        # Имена картинок повторяются между тестами с разными MEDIA_ROOT.
+        cache.clear()
+        KVStore.lru.clear()
+        shutil.rmtree(os.path.join(TEMP_MEDIA_ROOT, 'cache'),
+                      ignore_errors=True)
+
+    def thumbnail_files(self):
+        cache_dir = os.path.join(TEMP_MEDIA_ROOT, 'cache')
+        return [name for _, _, files in os.walk(cache_dir) for name in files]
+
+    def thumbnail_keys(self, name):
+        return default.kvstore._get(
+            ImageFile(name).key, identity='thumbnails')
+
+    def create_post(self):
+        return Post.objects.create(
+            author=self.user,
+            text='test-post-text',
+            image=SimpleUploadedFile('small.gif', SMALL_GIF, 'image/gif'),
+        )
+
+    def test_generate_thumbnails(self):
+        """Миниатюры создаются заранее, до показа ленты."""
+        post = self.create_post()
+        self.assertTrue(generate_thumbnails(post.image.name))
+        self.assertTrue(self.thumbnail_files())
+
+    @override_settings(TASKS_SYNC=False)
+    def test_failed_generation_retried_by_queue(self):
+        """Ошибка генерации возвращает задачу в очередь на повтор."""
+        job = generate_thumbnails.delay('posts/small.gif')
+        with mock.patch('posts.thumbnails.get_thumbnail',
+                        side_effect=OSError('boom')):
+            self.assertEqual(run_job(job.pk), Job.QUEUED)
+        job.refresh_from_db()
+        self.assertEqual(job.attempts, 1)
+        self.assertIn('boom', job.last_error)
+
+    def test_pregenerate_thumbnails_command(self):
+        """Команда создаёт миниатюры для существующих постов."""
+        self.create_post()
+        out = StringIO()
+        call_command('pregenerate_thumbnails', workers=1, stdout=out)
+        self.assertIn('Миниатюры готовы: 1, ошибок: 0', out.getvalue())
+        self.assertTrue(self.thumbnail_files())
+
+    def test_kvstore_lru_serves_without_cache_and_db(self):
+        """Повторный поиск миниатюры обходится без кэша и БД."""
+        post = self.create_post()
+        get_thumbnail(post.image.name, '960x339', crop='center')
+        cache.clear()
+        with self.assertNumQueries(0):
+            thumbnail = get_thumbnail(
+                post.image.name, '960x339', crop='center')
+        self.assertTrue(thumbnail.exists())
+
+    def test_replaced_image_drops_thumbnails(self):
+        """Замена картинки в post_edit сбрасывает старые миниатюры."""
+        post = self.create_post()
+        old_name = post.image.name
+        generate_thumbnails(old_name)
+        self.assertTrue(self.thumbnail_keys(old_name))
+        client = Client()
+        client.force_login(self.user)
+        client.post(
+            reverse('posts:post_edit', args=(post.id,)),
+            data={
+                'text': 'test-post-text',
+                'image': SimpleUploadedFile(
+                    'other.gif', SMALL_GIF, 'image/gif'),
+            },
+        )
+        post.refresh_from_db()
+        self.assertNotEqual(post.image.name, old_name)
+        self.assertIsNone(default.kvstore.get(ImageFile(old_name)))
+        self.assertFalse(self.thumbnail_keys(old_name))
+
+    def test_responsive_image_uses_pregenerated_variants(self):
+        """Тег отдаёт srcset с WebP только из готовых вариантов."""
+        post = self.create_post()
+        template = Template(
+            '{% load post_images %}{% responsive_image post.image %}')
+        html = template.render(Context({'post': post}))
+        self.assertIn(post.image.url, html)
+        self.assertNotIn('<picture>', html)
+        self.assertFalse(self.thumbnail_files())
+        generate_thumbnails(post.image.name)
+        post.refresh_from_db()
+        self.assertTrue(post.thumbnails_ready)
+        html = template.render(Context({'post': post}))
+        self.assertIn('<picture>', html)
+        self.assertIn('type="image/webp"', html)
+        self.assertIn('.webp 480w', html)
+        self.assertIn('.jpg 960w', html)
+
+    def test_index_with_original_images_not_cached(self):
+        """Ленту с исходными картинками вместо миниатюр не кэшируем."""
+        post = self.create_post()
+        url = reverse('posts:index')
+        guest = Client()
+        guest.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = guest.get(url)
+        self.assertGreater(len(queries), 1)
+        self.assertNotIn('<picture>', response.content.decode())
+        generate_thumbnails(post.image.name)
+        guest.get(url)
+        self.assertIn('<picture>', guest.get(url).content.decode())
+        with self.assertNumQueries(1):
+            guest.get(url)
+
+    @override_settings(TASKS_SYNC=False)
+    @mock.patch('posts.templatetags.post_images.transaction.on_commit',
+                side_effect=lambda callback: callback())
+    def test_feed_render_queues_thumbnails_once(self, on_commit):
+        """Отрисовка ленты без миниатюр ставит одну задачу на картинку."""
+        post = self.create_post()
+        Job.objects.all().delete()
+        template = Template(
+            '{% load post_images %}{% responsive_image post.image %}')
+        for _ in range(3):
+            template.render(Context({'post': post}))
+        job = Job.objects.get()
+        self.assertEqual(job.name, generate_thumbnails.name)
+        self.assertFalse(self.thumbnail_files())
+
+    def test_new_image_needs_new_thumbnails(self):
+        """Новая картинка поста снова ждёт своих миниатюр."""
+        post = self.create_post()
+        generate_thumbnails(post.image.name)
+        post.refresh_from_db()
+        post.image = SimpleUploadedFile('other.gif', SMALL_GIF, 'image/gif')
+        post.save()
+        post.refresh_from_db()
+        self.assertFalse(post.thumbnails_ready)
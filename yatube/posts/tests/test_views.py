@@ -1,13 +1,22 @@
+import gzip
 import shutil
 import tempfile
+from unittest import mock
 
 from django import forms
-from django.test import Client, TestCase, override_settings
+from django.core.cache import cache
+from django.test import (
+    Client, TestCase, TransactionTestCase, override_settings,
+)
 from django.urls import reverse
 from django.conf import settings
 from django.core.files.uploadedfile import SimpleUploadedFile
 
-from ..models import Group, Post, User
+from core import compression
+
+from ..counters import recount_all
+from ..models import Comment, Group, Post, User
+from ..utils import COMMENTS_PER_PAGE
 
 TOTAL_POSTS: int = 20
 POSTS_AUTHOR_USER: int = 13
@@ -203,3 +212,248 @@ class PostVievsTests(TestCase):
                 self.assertEqual(first_object.author.username, 'NoName')
                 self.assertEqual(first_object.text, 'new-test-post-text')
                 self.assertEqual(first_object.group.title, 'new')
+
+
+class PostQueryBudgetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='NoName')
+        cls.group = Group.objects.create(
+            title='test-text',
+            slug='test-slug',
+            description='test_description',
+        )
+        Post.objects.bulk_create(
+            Post(author=cls.user, text='test-post-text', group=cls.group)
+            for i in range(TOTAL_POSTS)
+        )
+        recount_all()
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_feed_query_budget(self):
+        """Лента выполняет фиксированное число запросов на страницу."""
+        pages_budget = {
+            reverse('posts:index'): 3,
+            reverse('posts:group_list',
+                    kwargs={'slug': self.group.slug}): 3,
+            reverse('posts:profile',
+                    kwargs={'username': self.user.username}): 3,
+        }
+        for reverse_name, budget in pages_budget.items():
+            for page in ('', '?page=2'):
+                with self.subTest(reverse_name=reverse_name, page=page):
+                    with self.assertNumQueries(budget):
+                        self.guest_client.get(reverse_name + page)
+                    cache.clear()
+
+
+class IndexCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='NoName')
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='test-post-text',
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_index_page_cached_for_guest(self):
+        """Повторный запрос гостя отдаётся из кэша: из БД только отметка."""
+        first = self.guest_client.get(reverse('posts:index'))
+        with self.assertNumQueries(1):
+            second = self.guest_client.get(reverse('posts:index'))
+        self.assertEqual(first.content, second.content)
+
+    def test_index_cache_reset_on_write(self):
+        """Новый пост и комментарий сбрасывают кэш ленты."""
+        self.guest_client.get(reverse('posts:index'))
+        self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={'text': 'fresh-post-text'},
+        )
+        response = self.guest_client.get(reverse('posts:index'))
+        self.assertContains(response, 'fresh-post-text')
+        self.authorized_client.post(
+            reverse('posts:add_comment', args=(self.post.id,)),
+            data={'text': 'comment-text'},
+        )
+        with self.assertNumQueries(3):
+            self.guest_client.get(reverse('posts:index'))
+
+    def test_compressed_page_cached_with_page(self):
+        """Сжатая лента хранится в кэше страниц и не сжимается повторно."""
+        url = reverse('posts:index')
+        with mock.patch('core.compression.compress',
+                        wraps=compression.compress) as compress:
+            first = self.guest_client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+            second = self.guest_client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(compress.call_count, 1)
+        self.assertEqual(second['Content-Encoding'], 'gzip')
+        self.assertEqual(first.content, second.content)
+        plain = self.guest_client.get(url)
+        self.assertEqual(gzip.decompress(second.content), plain.content)
+
+
+class CommentBatchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='NoName')
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='test-post-text',
+        )
+        Comment.objects.bulk_create(
+            Comment(post=cls.post, author=cls.user, text=f'comment-{i}')
+            for i in range(COMMENTS_PER_PAGE + 5)
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def test_post_detail_shows_first_batch(self):
+        """На странице поста выводится только первая порция комментариев."""
+        response = self.guest_client.get(
+            reverse('posts:post_detail', args=(self.post.id,)))
+        comments = response.context['comments']
+        self.assertEqual(len(comments), COMMENTS_PER_PAGE)
+        self.assertTrue(comments.has_next())
+        self.assertContains(
+            response, f'?comments_after={comments.next_cursor}')
+
+    def test_comments_json_batch(self):
+        """JSON-порция продолжает список и грузит авторов тем же запросом."""
+        response = self.guest_client.get(
+            reverse('posts:post_comments', args=(self.post.id,)))
+        first = response.json()
+        self.assertEqual(len(first['comments']), COMMENTS_PER_PAGE)
+        with self.assertNumQueries(2):
+            response = self.guest_client.get(
+                reverse('posts:post_comments', args=(self.post.id,)),
+                {'after': first['next']},
+            )
+        second = response.json()
+        self.assertEqual(len(second['comments']), 5)
+        self.assertIsNone(second['next'])
+        self.assertEqual(second['comments'][0]['author'], 'NoName')
+        ids = {comment['id']
+               for comment in first['comments'] + second['comments']}
+        self.assertEqual(
+            ids, set(Comment.objects.values_list('pk', flat=True)))
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='NoName')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test-slug', description='Описание')
+        cls.post = Post.objects.create(
+            author=cls.user, text='Тестовый пост', group=cls.group)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.urls = {
+            'index': reverse('posts:index'),
+            'group': reverse('posts:group_list', args=(self.group.slug,)),
+            'profile': reverse('posts:profile', args=(self.user.username,)),
+            'post': reverse('posts:post_detail', args=(self.post.id,)),
+        }
+
+    def revalidate(self, url, client=None):
+        client = client or self.guest_client
+        etag = client.get(url)['ETag']
+        return client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_unchanged_pages_answer_304_without_page_queries(self):
+        """Неизменившиеся страницы отвечают 304 без запросов страницы."""
+        # Один запрос — отметка изменения, у поста ещё и сам пост.
+        queries = {'index': 1, 'group': 1, 'profile': 1, 'post': 2}
+        for name, url in self.urls.items():
+            with self.subTest(name=name):
+                response = self.guest_client.get(url)
+                self.assertIn('Last-Modified', response)
+                with self.assertNumQueries(queries[name]):
+                    response = self.guest_client.get(
+                        url, HTTP_IF_NONE_MATCH=response['ETag'])
+                self.assertEqual(response.status_code, 304)
+
+    def test_new_post_changes_feeds(self):
+        """Новый пост меняет ленты, в которые попадает."""
+        etags = {name: self.guest_client.get(url)['ETag']
+                 for name, url in self.urls.items()}
+        Post.objects.create(author=self.user, text='Ещё', group=self.group)
+        for name in ('index', 'group', 'profile', 'post'):
+            with self.subTest(name=name):
+                response = self.guest_client.get(
+                    self.urls[name], HTTP_IF_NONE_MATCH=etags[name])
+                self.assertEqual(response.status_code, 200)
+
+    def test_comment_changes_only_post_page(self):
+        """Комментарий меняет страницу поста, но не ленту."""
+        etags = {name: self.guest_client.get(url)['ETag']
+                 for name, url in self.urls.items()}
+        Comment.objects.create(post=self.post, author=self.user, text='Да')
+        response = self.guest_client.get(
+            self.urls['post'], HTTP_IF_NONE_MATCH=etags['post'])
+        self.assertEqual(response.status_code, 200)
+        response = self.guest_client.get(
+            self.urls['index'], HTTP_IF_NONE_MATCH=etags['index'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_etag_depends_on_user(self):
+        """После входа страница не отдаётся из кэша гостя."""
+        etag = self.guest_client.get(self.urls['index'])['ETag']
+        self.guest_client.force_login(self.user)
+        response = self.guest_client.get(
+            self.urls['index'], HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            self.revalidate(self.urls['index']).status_code, 304)
+
+    def test_change_marks_shared_between_processes(self):
+        """Отметки изменения берутся из БД, а не из кэша процесса."""
+        etag = self.guest_client.get(self.urls['index'])['ETag']
+        # Другой процесс со своим пустым кэшем видит ту же отметку.
+        cache.clear()
+        response = self.guest_client.get(
+            self.urls['index'], HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        # Запись из другого процесса не трогает наш кэш страниц.
+        other = Post(author=self.user, text='Из другого процесса')
+        with mock.patch('posts.signals.invalidate_index_pages'):
+            other.save()
+        response = self.guest_client.get(
+            self.urls['index'], HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, 'Из другого процесса')
+
+
+@override_settings(READ_POOL_SIZE=2)
+class ConcurrentReadsTests(TransactionTestCase):
+    def test_pages_render_with_read_pool(self):
+        """Профиль и пост собираются из параллельных чтений."""
+        cache.clear()
+        user = User.objects.create_user(username='NoName')
+        post = Post.objects.create(author=user, text='Тестовый пост')
+        Comment.objects.create(post=post, author=user, text='Комментарий')
+        client = Client()
+        client.force_login(User.objects.create_user(username='reader'))
+        response = client.get(reverse('posts:post_detail', args=(post.id,)))
+        self.assertEqual(len(response.context['comments']), 1)
+        self.assertEqual(response.context['post_more'], post)
+        response = client.get(reverse('posts:profile', args=(user.username,)))
+        self.assertEqual(len(response.context['page_obj']), 1)
+        self.assertFalse(response.context['following'])
+        response = client.get(reverse('posts:post_detail', args=(999,)))
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,89 @@
+import logging
+
+from django.db import connection
+from sorl.thumbnail import get_thumbnail
+
+from core.tasks import task
+
+from .cache import invalidate_index_pages, post_page_scopes, touch_pages
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+CARD_WIDTH: int = 960
+CARD_HEIGHT: int = 339
+RESPONSIVE_WIDTHS = (480, 960)
+RESPONSIVE_FORMATS = ('WEBP', 'JPEG')
+
+
+def responsive_variants():
+    """Ширина, формат, геометрия и опции каждого варианта карточки."""
+    for width in RESPONSIVE_WIDTHS:
+        height = round(width * CARD_HEIGHT / CARD_WIDTH)
+        for image_format in RESPONSIVE_FORMATS:
+            yield (width, image_format, f'{width}x{height}',
+                   {'crop': 'center', 'format': image_format})
+
+
+def responsive_sources(image):
+    """Готовые варианты картинки по форматам или None, пока их нет.
+
+    Готовность отмечает в посте generate_thumbnails. Для созданных
+    вариантов get_thumbnail только находит их в kvstore.
+    """
+    if not getattr(image.instance, 'thumbnails_ready', False):
+        return None
+    sources = {}
+    for width, image_format, geometry, options in responsive_variants():
+        thumbnail = get_thumbnail(image.name, geometry, **options)
+        sources.setdefault(image_format, []).append((thumbnail, width))
+    return sources
+
+
+# Геометрии карточки в ленте и тега {% thumbnail %} в post_detail.html.
+THUMBNAIL_GEOMETRIES = tuple(
+    (geometry, options) for _, _, geometry, options in responsive_variants()
+) + (
+    ('960x339', {'crop': 'center', 'upscale': True}),
+)
+
+
+def mark_thumbnails_ready(name):
+    """Отмечает посты с картинкой name: их страницы пора обновить."""
+    posts = list(Post.objects.filter(
+        image=name, thumbnails_ready=False).select_related('author'))
+    if not posts:
+        return
+    Post.objects.filter(pk__in=[post.pk for post in posts]).update(
+        thumbnails_ready=True)
+    touch_pages(*{scope for post in posts for scope in post_page_scopes(post)})
+    invalidate_index_pages()
+
+
+@task
+def generate_thumbnails(name):
+    """Создаёт миниатюры всех геометрий, чтобы страница их не ждала.
+
+    Ошибка не глушится: очередь задач повторит попытку с паузой.
+    """
+    for geometry, options in THUMBNAIL_GEOMETRIES:
+        get_thumbnail(name, geometry, **options)
+    mark_thumbnails_ready(name)
+    return True
+
+
+def try_generate(name):
+    """Генерация вне очереди задач: ошибка в журнал, результат — флаг."""
+    try:
+        return generate_thumbnails(name)
+    except Exception:
+        logger.exception('Не удалось создать миниатюры для %s', name)
+        return False
+
+
+def generate_in_thread(name):
+    """Запуск в пуле потоков: соединение потока с БД закрывается."""
+    try:
+        return try_generate(name)
+    finally:
+        connection.close()
@@ -0,0 +1,178 @@
+from itertools import islice
+
+from django.conf import settings
+
+from core.tasks import task
+
+from .models import AuthorStats, Follow, Post, TimelineEntry
+from .utils import LAST_10_POSTS, CursorPage, CursorPaginator, decode_cursor
+
+FANOUT_BATCH_SIZE: int = 1000
+FOLLOW_BACKFILL: int = 100
+
+
+def fanout_limit():
+    return getattr(settings, 'FOLLOW_FANOUT_LIMIT', 1000)
+
+
+def is_popular(author_id):
+    """У популярного автора посты не раскладываются по лентам при записи."""
+    return Follow.objects.filter(
+        author_id=author_id,
+        author__post_stats__follower_count__gt=fanout_limit(),
+    ).exists()
+
+
+@task
+def fan_out_post(post_id):
+    """Кладёт новый пост в ленты подписчиков автора пачками."""
+    post = Post.objects.filter(pk=post_id).only('author', 'pub_date').first()
+    if post is None or is_popular(post.author_id):
+        return
+    followers = Follow.objects.filter(
+        author_id=post.author_id).values_list('user_id', flat=True).iterator()
+    while True:
+        batch = list(islice(followers, FANOUT_BATCH_SIZE))
+        if not batch:
+            break
+        # Подписавшийся до запуска задачи уже получил пост через
+        # backfill_timeline, да и повтор задачи не должен падать.
+        TimelineEntry.objects.bulk_create(
+            [
+                TimelineEntry(user_id=user_id, post_id=post.pk,
+                              author_id=post.author_id,
+                              pub_date=post.pub_date)
+                for user_id in batch
+            ],
+            ignore_conflicts=True,
+        )
+
+
+def recent_posts(author_id):
+    return list(
+        Post.objects.filter(author_id=author_id)
+        .order_by('-pub_date', '-pk')
+        .values_list('pk', 'pub_date')[:FOLLOW_BACKFILL]
+    )
+
+
+def add_entries(user_ids, author_id, posts):
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(user_id=user_id, post_id=post_id,
+                          author_id=author_id, pub_date=pub_date)
+            for user_id in user_ids
+            for post_id, pub_date in posts
+        ],
+        batch_size=FANOUT_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def backfill_timeline(user, author):
+    """После подписки добавляет в ленту последние посты автора."""
+    if is_popular(author.pk):
+        return
+    add_entries([user.pk], author.pk, recent_posts(author.pk))
+
+
+@task
+def backfill_followers(author_id):
+    """Раскладывает последние посты автора по лентам всех подписчиков.
+
+    Нужна, когда автор перестал быть популярным: его посты в ленты
+    не раскладывались, а читать их напрямую follow_page уже не будет.
+    """
+    if is_popular(author_id):
+        return
+    posts = recent_posts(author_id)
+    if not posts:
+        return
+    followers = Follow.objects.filter(
+        author_id=author_id).values_list('user_id', flat=True).iterator()
+    users_per_batch = max(1, FANOUT_BATCH_SIZE // len(posts))
+    while True:
+        batch = list(islice(followers, users_per_batch))
+        if not batch:
+            break
+        add_entries(batch, author_id, posts)
+
+
+def rebuild_timelines():
+    """Раскладывает последние посты авторов по лентам подписчиков.
+
+    Нужна после bulk_create: fan_out_post для таких постов не
+    вызывался. Уже разложенные записи не дублируются.
+    """
+    authors = list(
+        Follow.objects.order_by().values_list('author_id', flat=True)
+        .distinct())
+    for author_id in authors:
+        backfill_followers(author_id)
+
+
+def backfill_if_demoted(author_id):
+    """После отписки проверяет, не опустился ли автор до порога."""
+    follower_count = AuthorStats.objects.filter(
+        author_id=author_id).values_list('follower_count', flat=True).first()
+    if follower_count == fanout_limit():
+        backfill_followers.delay(author_id)
+
+
+def drop_timeline(user_id, author_id):
+    TimelineEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+def follow_page(user, after=None, before=None):
+    """Страница ленты подписок за O(размер страницы).
+
+    Посты обычных авторов читаются из материализованной ленты, посты
+    каждого популярного — отдельной выборкой по индексу
+    (author, -pub_date, -id), и всё сливается. Общая выборка по
+    author_id IN (...) сортировала бы посты всех авторов целиком.
+    """
+    entries = CursorPaginator(
+        TimelineEntry.objects.filter(user=user).select_related(
+            'post__author', 'post__group'),
+        LAST_10_POSTS,
+        id_field='post_id',
+    )
+    sources = [entries]
+    popular = list(
+        Follow.objects.filter(
+            user=user,
+            author__post_stats__follower_count__gt=fanout_limit(),
+        ).values_list('author_id', flat=True)
+    )
+    sources.extend(
+        CursorPaginator(
+            Post.objects.for_feed().filter(author_id=author_id),
+            LAST_10_POSTS,
+        )
+        for author_id in popular
+    )
+    before_key = decode_cursor(before)
+    if before_key is not None:
+        rows, has_previous = merge(sources, before_key=before_key)
+        if rows:
+            return CursorPage(rows[-LAST_10_POSTS:], entries, True,
+                              has_previous)
+    after_key = decode_cursor(after)
+    rows, has_next = merge(sources, after_key=after_key)
+    return CursorPage(rows[:LAST_10_POSTS], entries, has_next,
+                      after_key is not None)
+
+
+def merge(sources, after_key=None, before_key=None):
+    """Сливает выборки источников без повторов по убыванию ключа."""
+    posts = {}
+    has_more = False
+    for source in sources:
+        rows, more = source.fetch(after_key, before_key)
+        has_more = has_more or more
+        for row in rows:
+            post = row.post if isinstance(row, TimelineEntry) else row
+            posts[post.pk] = post
+    rows = sorted(posts.values(), key=lambda post: (post.pub_date, post.pk),
+                  reverse=True)
+    return rows, has_more or len(rows) > LAST_10_POSTS
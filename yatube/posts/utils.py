@@ -1,9 +1,171 @@
-from django.core.paginator import Paginator
+import base64
+import binascii
+
+from django.conf import settings
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+from .models import Comment
 
 LAST_10_POSTS: int = 10
+COMMENTS_PER_PAGE: int = 20
+PAGE_WINDOW: int = 5
+
+
+class NumberedPage(Page):
+    """Страница с окном соседних номеров вместо полного page_range."""
+
+    @property
+    def page_window(self):
+        first = max(self.number - PAGE_WINDOW, 1)
+        last = min(self.number + PAGE_WINDOW, self.paginator.num_pages)
+        return range(first, last + 1)
+
+
+class NumberedPaginator(Paginator):
+    def _get_page(self, *args, **kwargs):
+        return NumberedPage(*args, **kwargs)
+
+
+class CursorPage(Page):
+    """Страница курсорной пагинации: без номера, только соседи."""
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        super().__init__(object_list, None, paginator)
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return '<Cursor page>'
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    @property
+    def next_cursor(self):
+        if self.has_next() and self.object_list:
+            return encode_cursor(self.object_list[-1])
+        return None
+
+    @property
+    def previous_cursor(self):
+        if self.has_previous() and self.object_list:
+            return encode_cursor(self.object_list[0])
+        return None
+
+
+class CursorPaginator(Paginator):
+    """Пагинация по ключу (pub_date, id) без OFFSET.
+
+    Время выборки страницы не зависит от её глубины, а COUNT(*)
+    выполняется только при with_count=True. id_field задаёт поле
+    с id поста, если страница строится не по самой таблице постов.
+    """
+
+    def __init__(self, object_list, per_page, with_count=False,
+                 id_field='pk'):
+        super().__init__(object_list, per_page)
+        self.with_count = with_count
+        self.id_field = id_field
+
+    @cached_property
+    def count(self):
+        if not self.with_count:
+            return None
+        return super().count
+
+    @cached_property
+    def num_pages(self):
+        if self.count is None:
+            return None
+        return super().num_pages
+
+    def fetch(self, after_key=None, before_key=None):
+        """Строки по убыванию ключа рядом с курсором и флаг продолжения.
+
+        С before_key — ближайшие более новые строки, флаг говорит, есть ли
+        ещё новее; иначе — более старые строки после after_key.
+        """
+        id_field = self.id_field
+        queryset = self.object_list.order_by('-pub_date', f'-{id_field}')
+        if before_key is not None:
+            pub_date, pk = before_key
+            queryset = queryset.filter(pub_date__gte=pub_date).filter(
+                Q(pub_date__gt=pub_date) | Q(**{f'{id_field}__gt': pk})
+            ).order_by('pub_date', id_field)
+        elif after_key is not None:
+            pub_date, pk = after_key
+            # Граница по pub_date отдельным условием даёт поиск по индексу.
+            queryset = queryset.filter(pub_date__lte=pub_date).filter(
+                Q(pub_date__lt=pub_date) | Q(**{f'{id_field}__lt': pk})
+            )
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if before_key is not None:
+            rows.reverse()
+        return rows, has_more
+
+    def get_page(self, after=None, before=None):
+        before_key = decode_cursor(before)
+        if before_key is not None:
+            rows, has_previous = self.fetch(before_key=before_key)
+            if rows:
+                return CursorPage(rows, self, True, has_previous)
+        after_key = decode_cursor(after)
+        rows, has_next = self.fetch(after_key=after_key)
+        return CursorPage(rows, self, has_next, after_key is not None)
+
+
+def encode_cursor(post):
+    raw = f'{post.pub_date.isoformat()}|{post.pk}'.encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(cursor):
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        pub_date, pk = raw.rsplit('|', 1)
+        pub_date = parse_datetime(pub_date)
+        pk = int(pk)
+    except (binascii.Error, UnicodeError, ValueError):
+        return None
+    if pub_date is None:
+        return None
+    return pub_date, pk
+
+
+def comments_page(post_id, after=None):
+    """Очередная порция комментариев поста вместе с авторами."""
+    paginator = CursorPaginator(
+        Comment.objects.filter(post_id=post_id).select_related('author'),
+        COMMENTS_PER_PAGE)
+    return paginator.get_page(after=after)
+
+
+def load_page(page):
+    """Выполняет запрос страницы сразу, а не при отрисовке шаблона."""
+    page.object_list = list(page.object_list)
+    return page
 
 
-def paginator_create(request, list):
-    paginator = Paginator(list, LAST_10_POSTS)
+def paginator_create(request, list, count=None):
+    after = request.GET.get('after')
+    before = request.GET.get('before')
+    if (after or before
+            or getattr(settings, 'POSTS_CURSOR_PAGINATION', False)):
+        paginator = CursorPaginator(list, LAST_10_POSTS)
+        return paginator.get_page(after=after, before=before)
+    paginator = NumberedPaginator(list, LAST_10_POSTS)
+    if count is not None:
+        # Готовый счётчик избавляет от COUNT(*) при нумерации страниц.
+        paginator.count = count
     page_number = request.GET.get('page')
     return paginator.get_page(page_number)
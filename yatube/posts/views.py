@@ -1,24 +1,67 @@
+from urllib.parse import urlencode
+
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
+from django.http import Http404, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse
+from django.views.decorators.http import condition, require_POST
+
+from core.compression import cache_page, cached_page
+from core.concurrency import gather
+from core.db import replica_reads
 
+from .cache import INDEX_PAGE_TIMEOUT, index_page_key, page_validators
+from .cards import cacheable
+from .counters import author_post_count
+from .exporter import RENDERERS, export_stream
 from .forms import PostForm, CommentForm
-from .models import Group, Post, User
-from .utils import paginator_create
+from .importer import KINDS
+from .models import Follow, Group, Post, User
+from .revisions import current_version, rebuild
+from .search import SearchResults
+from .timeline import follow_page
+from .utils import (
+    LAST_10_POSTS, NumberedPaginator, comments_page, load_page,
+    paginator_create,
+)
+
 
+def post_scopes(request, post_id):
+    # Страница поста показывает и число постов автора.
+    username = Post.objects.filter(pk=post_id).values_list(
+        'author__username', flat=True).first()
+    return [f'post:{post_id}', f'profile:{username}']
 
+
+@condition(**page_validators(lambda request: ['index']))
+@replica_reads
 def index(request):
-    post_list = Post.objects.all()
+    cache_key = None
+    if not request.user.is_authenticated:
+        cache_key = index_page_key(request)
+        response = cached_page(cache_key, INDEX_PAGE_TIMEOUT)
+        if response is not None:
+            return response
+    post_list = Post.objects.for_feed()
     page_obj = paginator_create(request, post_list)
     context = {
         'page_obj': page_obj,
     }
-    return render(request, 'posts/index.html', context)
+    response = render(request, 'posts/index.html', context)
+    # Пока миниатюр нет, в ленте исходные картинки в полный размер:
+    # такую страницу не кэшируем, следующий запрос получит srcset.
+    if cache_key is not None and all(map(cacheable, page_obj)):
+        cache_page(response, cache_key, INDEX_PAGE_TIMEOUT)
+    return response
 
 
+@condition(**page_validators(lambda request, slug: [f'group:{slug}']))
+@replica_reads
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.all()
-    page_obj = paginator_create(request, post_list)
+    post_list = group.posts.for_feed()
+    page_obj = paginator_create(request, post_list, group.post_count)
     context = {
         'group': group,
         'page_obj': page_obj,
@@ -26,24 +69,42 @@ def group_posts(request, slug):
     return render(request, 'posts/group_list.html', context)
 
 
+@condition(**page_validators(
+    lambda request, username: [f'profile:{username}']))
+@replica_reads
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    post_list = author.posts.all()
-    page_obj = paginator_create(request, post_list)
-    post_count = post_list.count()
+    author = get_object_or_404(
+        User.objects.select_related('post_stats'), username=username)
+    post_count = author_post_count(author)
+    user = request.user if request.user.is_authenticated else None
+    page_obj, following = gather(
+        lambda: load_page(paginator_create(
+            request, author.posts.for_feed(), post_count)),
+        lambda: user is not None and Follow.objects.filter(
+            user=user, author=author).exists(),
+    )
     context = {
         'author': author,
         'post_count': post_count,
         'page_obj': page_obj,
+        'following': following,
     }
     return render(request, 'posts/profile.html', context)
 
 
+@condition(**page_validators(post_scopes))
+@replica_reads
 def post_detail(request, post_id):
-    post_more = get_object_or_404(Post, pk=post_id)
-    post_count = post_more.author.posts.count()
+    # Пост и первая порция комментариев не зависят друг от друга.
+    post_more, comments = gather(
+        lambda: Post.objects.select_related(
+            'author__post_stats', 'group').filter(pk=post_id).first(),
+        lambda: comments_page(post_id, request.GET.get('comments_after')),
+    )
+    if post_more is None:
+        raise Http404
+    post_count = author_post_count(post_more.author)
     form = CommentForm(request.POST or None)
-    comments = post_more.comments.all()
     context = {
         'post_more': post_more,
         'post_count': post_count,
@@ -53,6 +114,35 @@ def post_detail(request, post_id):
     return render(request, 'posts/post_detail.html', context)
 
 
+def post_comments(request, post_id):
+    post = get_object_or_404(Post.objects.only('id'), pk=post_id)
+    page = comments_page(post.pk, request.GET.get('after'))
+    comments = [
+        {
+            'id': comment.pk,
+            'author': comment.author.username,
+            'author_url': reverse('posts:profile',
+                                  args=(comment.author.username,)),
+            'text': comment.text,
+            'pub_date': comment.pub_date.isoformat(),
+        }
+        for comment in page
+    ]
+    return JsonResponse({'comments': comments, 'next': page.next_cursor})
+
+
+def search(request):
+    query = request.GET.get('q', '').strip()
+    paginator = NumberedPaginator(SearchResults(query), LAST_10_POSTS)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+        'page_query': urlencode({'q': query}) + '&',
+    }
+    return render(request, 'posts/search.html', context)
+
+
 @login_required
 def post_create(request):
     if request.method == 'POST':
@@ -82,6 +172,24 @@ def post_edit(request, post_id):
     return render(request, 'posts/post_create.html', context)
 
 
+@login_required
+def post_history(request, post_id, version=None):
+    post = get_object_or_404(Post, id=post_id)
+    if post.author != request.user and not request.user.is_staff:
+        return redirect('posts:post_detail', post_id)
+    latest = current_version(post)
+    if version is not None and not 1 <= version <= latest:
+        raise Http404
+    context = {
+        'post': post,
+        'revisions': post.revisions.values('number', 'created'),
+        'latest': latest,
+        'version': version or latest,
+        'text': rebuild(post, version) if version else post.text,
+    }
+    return render(request, 'posts/post_history.html', context)
+
+
 @login_required
 def add_comment(request, post_id):
     post = get_object_or_404(Post, id=post_id)
@@ -92,3 +200,49 @@ def add_comment(request, post_id):
         comment.post = post
         comment.save()
     return redirect('posts:post_detail', post_id=post_id)
+
+
+@login_required
+def follow_index(request):
+    page_obj = follow_page(request.user, after=request.GET.get('after'),
+                           before=request.GET.get('before'))
+    return render(request, 'posts/follow.html', {'page_obj': page_obj})
+
+
+@require_POST
+@login_required
+def profile_follow(request, username):
+    author = get_object_or_404(User, username=username)
+    if author != request.user:
+        Follow.objects.get_or_create(user=request.user, author=author)
+    return redirect('posts:profile', username=username)
+
+
+@require_POST
+@login_required
+def profile_unfollow(request, username):
+    author = get_object_or_404(User, username=username)
+    follow = Follow.objects.filter(user=request.user, author=author).first()
+    if follow is not None:
+        follow.delete()
+    return redirect('posts:profile', username=username)
+
+
+@staff_member_required
+def export(request):
+    format = request.GET.get('format', 'jsonl')
+    if format not in RENDERERS:
+        raise Http404
+    kinds = [kind for kind in request.GET.getlist('kind') if kind in KINDS]
+    compress = request.GET.get('gzip') == '1'
+    filename = f'yatube.{format}'
+    content_type = 'text/csv' if format == 'csv' else 'application/x-ndjson'
+    if compress:
+        filename += '.gz'
+        content_type = 'application/gzip'
+    response = StreamingHttpResponse(
+        export_stream(format, compress, kinds or KINDS),
+        content_type=content_type,
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/2.2/ref/settings/
 """
 
 import os
+import tempfile
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -50,6 +51,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.perf.PerfStatsMiddleware',
+    'core.db.ReplicaMiddleware',
+    'core.compression.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -64,7 +68,7 @@ ROOT_URLCONF = 'yatube.urls'
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.perf.TimedDjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -93,6 +97,19 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/2.2/topics/cache/
+# Local memory is per process: use a shared backend (Memcached, Redis)
+# when running several workers, otherwise invalidation stays local.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'yatube',
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
 
@@ -133,7 +150,14 @@ STATIC_URL = '/static/'
 
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
-EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+# Mail is queued in core.OutboxEmail and delivered in batches by the
+# core.mail.deliver_outbox task over OUTBOX_EMAIL_BACKEND (SMTP in production).
+# Mail claimed by a worker that died is sent again after OUTBOX_CLAIM_TIMEOUT
+# seconds.
+EMAIL_BACKEND = 'core.mail.OutboxBackend'
+OUTBOX_EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+OUTBOX_BATCH_SIZE = 100
+OUTBOX_CLAIM_TIMEOUT = 600
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
@@ -142,3 +166,48 @@ CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 # https://docs.djangoproject.com/en/2.2/howto/static-files/
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+# Keyset pagination for the post feeds: no OFFSET and no COUNT(*).
+POSTS_CURSOR_PAGINATION = False
+
+# sorl-thumbnail lookups: in-process LRU, then the cache, then the DB table.
+THUMBNAIL_KVSTORE = 'posts.kvstore.KVStore'
+THUMBNAIL_LRU_SIZE = 1024
+THUMBNAIL_LRU_TIMEOUT = 300
+
+# Authors with more followers than this are not fanned out on write;
+# their posts are merged into the follow feed on read instead.
+FOLLOW_FANOUT_LIMIT = 1000
+
+# Background tasks (core.tasks). .delay() stores a job for
+# `manage.py runworker`, which must run next to the web server. The test
+# runner turns on TASKS_SYNC, where .delay() runs the task inline.
+TASKS_SYNC = False
+TEST_RUNNER = 'core.testing.TestRunner'
+TASKS_RETRY_DELAY = 10
+TASKS_LOCK_TIMEOUT = 600
+
+# Per-view latency histograms (core.perf). Each process writes a snapshot
+# here every PERFSTATS_FLUSH_INTERVAL seconds for `manage.py perfstats`.
+PERFSTATS_DIR = os.path.join(tempfile.gettempdir(), 'yatube-perfstats')
+PERFSTATS_FLUSH_INTERVAL = 10
+
+# Threads for independent read queries inside one request (core.concurrency).
+# 0 runs them one after another in the request thread. Pays off only when
+# query latency dominates (a networked DB); see `benchmark --throughput`.
+READ_POOL_SIZE = 0
+
+# Read replicas: aliases from DATABASES that the read-only posts views may
+# read from (core.db.ReplicaRouter). After a write the client reads from the
+# primary for READ_YOUR_WRITES_SECONDS, until the replicas catch up.
+DATABASE_ROUTERS = ['core.db.ReplicaRouter']
+DATABASE_REPLICAS = []
+READ_YOUR_WRITES_SECONDS = 10
+
+# core.compression.CompressionMiddleware minifies HTML and compresses
+# responses with gzip, or brotli when the Brotli package is installed.
+
+# Compile every template when the WSGI application starts (core.templates),
+# so that the first requests after a deploy do not parse them. Useful with
+# the cached template loader, see settings_production.
+TEMPLATES_WARMUP = False
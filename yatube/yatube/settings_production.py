@@ -0,0 +1,70 @@
+"""
+Production profile: DJANGO_SETTINGS_MODULE=yatube.settings_production.
+
+Everything from settings.py, plus SQLite tuned for concurrent requests.
+"""
+
+import os
+
+from .settings import *  # noqa: F401,F403
+from .settings import DATABASES, TEMPLATES
+
+DEBUG = False
+
+# WAL: readers do not block the writer and the writer does not block
+# readers. synchronous=NORMAL is safe in WAL mode (a power loss may drop the
+# last transactions, but never corrupts the file). cache_size is in KiB when
+# negative. busy_timeout is how long a writer waits for the lock, in ms.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -64000,
+    'mmap_size': 256 * 1024 * 1024,
+    'busy_timeout': 5000,
+    'temp_store': 'MEMORY',
+}
+
+DATABASES = {'default': {
+    **DATABASES['default'],
+    'ENGINE': 'core.backends.sqlite3',
+    # Keep the connection between requests instead of reopening it.
+    'CONN_MAX_AGE': 600,
+    'OPTIONS': {
+        'pragmas': SQLITE_PRAGMAS,
+        # Write transactions take the lock at BEGIN and wait for it.
+        'transaction_mode': 'IMMEDIATE',
+    },
+}}
+
+# Parse each template once per process and keep the compiled version.
+# APP_DIRS must be off when loaders are set: app templates come from the
+# app_directories loader inside the cached one.
+TEMPLATES = [{
+    **TEMPLATES[0],
+    'APP_DIRS': False,
+    'OPTIONS': {
+        **TEMPLATES[0]['OPTIONS'],
+        'loaders': [('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ])],
+    },
+}]
+TEMPLATES_WARMUP = True
+
+# Thumbnails, follow timeline fan-out and outbox mail go to the job queue
+# instead of running inside the request: run `manage.py runworker` next to
+# the web workers, or these jobs are never executed.
+TASKS_SYNC = False
+
+# The outbox delivers over SMTP. The server and credentials come from the
+# environment so they stay out of the repository.
+OUTBOX_EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+EMAIL_HOST = os.environ.get('EMAIL_HOST', 'localhost')
+EMAIL_PORT = int(os.environ.get('EMAIL_PORT', 25))
+EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', '')
+EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
+EMAIL_USE_TLS = os.environ.get('EMAIL_USE_TLS', '') == '1'
+DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'noreply@yatube.ru')
+# Fail the delivery job instead of hanging on an unreachable server.
+EMAIL_TIMEOUT = 30